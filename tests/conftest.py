@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -33,6 +35,18 @@ assert any(app in INSTALLED_APPS for app in ['posts.apps.PostsConfig', 'posts'])
     'Пожалуйста зарегистрируйте приложение в `settings.INSTALLED_APPS`'
 )
 
+
+
+@pytest.fixture(autouse=True)
+def inline_thumbnails(monkeypatch):
+    """Миниатюры создаются в самом тесте, а не в потоках пула.
+
+    Потоки пула пишут в ту же тестовую базу SQLite и блокируют ее таблицы.
+    """
+    from posts import thumbnails
+    monkeypatch.setattr(thumbnails, 'THUMBNAIL_WORKERS', 0)
+
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
@@ -0,0 +1,67 @@
+"""Проекции моделей для JSON API: поля ответа и колонки базы.
+
+Объекты моделей не создаются: строки читаются через
+values_list(named=True) только с выбранными колонками, автор и группа
+поста приходят тем же запросом через JOIN.
+"""
+from posts.models import Post
+from posts.utils import CursorPaginator
+
+IMAGE_STORAGE = Post._meta.get_field('image').storage
+
+
+def image_url(name):
+    return IMAGE_STORAGE.url(name) if name else None
+
+
+def empty_to_none(value):
+    return value or None
+
+
+class Projection:
+    """Поля ответа: имя в JSON -> путь к колонке в ORM."""
+
+    def __init__(self, fields, converters=None):
+        self.fields = fields
+        self.converters = converters or {}
+
+    def unknown(self, names):
+        return [name for name in names if name not in self.fields]
+
+    def rows(self, queryset, names, keys=CursorPaginator.KEYS):
+        """Строки с колонками полей names и ключом курсора keys."""
+        paths = [*keys, *(self.fields[name] for name in names)]
+        return queryset.values_list(*dict.fromkeys(paths), named=True)
+
+    def serialize(self, row, names):
+        data = {}
+        for name in names:
+            value = getattr(row, self.fields[name])
+            converter = self.converters.get(name)
+            data[name] = converter(value) if converter else value
+        return data
+
+
+POSTS = Projection(
+    {
+        'id': 'pk',
+        'text': 'text',
+        'created': 'created',
+        'modified': 'modified',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+        'thumbnail': 'thumbnail_url',
+        'comment_count': 'comment_count',
+    },
+    {'image': image_url, 'thumbnail': empty_to_none},
+)
+
+COMMENTS = Projection({
+    'id': 'pk',
+    'post': 'post_id',
+    'text': 'text',
+    'created': 'created',
+    'modified': 'modified',
+    'author': 'author__username',
+})
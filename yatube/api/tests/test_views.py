@@ -0,0 +1,130 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post
+from posts.seed import explicit_created
+
+User = get_user_model()
+
+
+class ApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(title='Группа', slug='api')
+        now = timezone.now()
+        with explicit_created(Post):
+            Post.objects.bulk_create([
+                Post(author=cls.author, text=f'Пост {i}',
+                     group=cls.group if i % 2 else None,
+                     created=now - timedelta(minutes=i), modified=now)
+                for i in range(25)
+            ])
+        cls.post = Post.objects.order_by('-created').first()
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def get_json(self, url, client=None, **params):
+        response = (client or self.client).get(url, params)
+        content = (b''.join(response.streaming_content)
+                   if response.streaming else response.content)
+        return response, json.loads(content)
+
+    def test_feed_pages(self):
+        """Лента отдается страницами по курсору, новые посты сначала."""
+        url = reverse('api:posts')
+        response, data = self.get_json(url)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(
+            [post['text'] for post in data['results']],
+            [f'Пост {i}' for i in range(10)])
+        self.assertEqual(data['results'][0], {
+            'id': self.post.pk,
+            'text': 'Пост 0',
+            'created': data['results'][0]['created'],
+            'modified': data['results'][0]['modified'],
+            'author': 'Author',
+            'group': None,
+            'image': None,
+            'thumbnail': None,
+            'comment_count': 1,
+        })
+        seen = []
+        while True:
+            seen.extend(post['text'] for post in data['results'])
+            if data['next'] is None:
+                break
+            _, data = self.get_json(url, cursor=data['next'], limit=7)
+        self.assertEqual(seen, [f'Пост {i}' for i in range(25)])
+
+    def test_one_query(self):
+        """Страница ленты — один запрос к базе."""
+        with self.assertNumQueries(1):
+            self.get_json(reverse('api:posts'))
+
+    def test_fields(self):
+        """?fields= оставляет только выбранные поля."""
+        _, data = self.get_json(reverse('api:posts'), fields='id,author')
+        self.assertEqual(set(data['results'][0]), {'id', 'author'})
+        response, data = self.get_json(
+            reverse('api:posts'), fields='id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', data['detail'])
+
+    def test_filtered_feeds(self):
+        """Посты группы, автора и подписок."""
+        cases = {
+            reverse('api:group_posts', kwargs={'slug': 'api'}): 12,
+            reverse('api:author_posts', kwargs={'username': 'Author'}): 25,
+            reverse('api:follow_posts'): 25,
+        }
+        for url, total in cases.items():
+            with self.subTest(url=url):
+                _, data = self.get_json(
+                    url, client=self.authorized_client, limit=100)
+                self.assertEqual(len(data['results']), total)
+                self.assertIsNone(data['next'])
+
+    def test_detail_and_comments(self):
+        """Пост и его комментарии."""
+        _, data = self.get_json(reverse(
+            'api:post_detail', kwargs={'post_id': self.post.pk}),
+            fields='text')
+        self.assertEqual(data, {'text': 'Пост 0'})
+        _, data = self.get_json(reverse(
+            'api:comments', kwargs={'post_id': self.post.pk}))
+        self.assertEqual(
+            [(comment['author'], comment['text'])
+             for comment in data['results']],
+            [('Reader', 'Комментарий')])
+
+    def test_errors(self):
+        """Ошибки отдаются в JSON с нужным статусом."""
+        cases = [
+            (reverse('api:follow_posts'), {}, 401),
+            (reverse('api:post_detail', kwargs={'post_id': 100500}), {}, 404),
+            (reverse('api:group_posts', kwargs={'slug': 'none'}), {}, 404),
+            (reverse('api:posts'), {'limit': 1000}, 400),
+            (reverse('api:posts'), {'limit': 'много'}, 400),
+            (reverse('api:posts'), {'cursor': 'плохой'}, 400),
+        ]
+        for url, params, status in cases:
+            with self.subTest(url=url, params=params):
+                response, data = self.get_json(url, **params)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', data)
+        response = self.client.post(reverse('api:posts'))
+        self.assertEqual(response.status_code, 405)
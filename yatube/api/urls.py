@@ -0,0 +1,19 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    # Лента всех постов
+    path('v1/posts/', views.posts, name='posts'),
+    path('v1/posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('v1/posts/<int:post_id>/comments/',
+         views.comments, name='comments'),
+    path('v1/groups/<slug:slug>/posts/',
+         views.group_posts, name='group_posts'),
+    path('v1/users/<str:username>/posts/',
+         views.author_posts, name='author_posts'),
+    # Лента подписок текущего пользователя
+    path('v1/follow/posts/', views.follow_posts, name='follow_posts'),
+]
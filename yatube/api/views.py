@@ -0,0 +1,154 @@
+"""JSON API лент и постов, версия 1.
+
+Списки отдаются страницами по курсору: ?cursor= из поля next
+предыдущего ответа и ?limit= (не больше API_MAX_LIMIT). ?fields=id,text
+оставляет в ответе только перечисленные поля, и из базы читаются
+только их колонки. Страница списка пишется в ответ потоком, строка
+за строкой, без промежуточного списка объектов.
+"""
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+
+from posts import caching, timeline
+from posts.models import Comment, Post
+from posts.utils import CursorPaginator
+from yatube.settings import API_MAX_LIMIT, COMMENTS_LIMIT, POSTS_LIMIT
+from .projections import COMMENTS, POSTS
+
+JSON_PARAMS = {'ensure_ascii': False}
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def error(status, detail):
+    return JsonResponse(
+        {'detail': detail}, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def api_view(view):
+    """Только GET; ошибки и 404 отдаются в JSON, а не страницей."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return error(405, 'Метод не поддерживается.')
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return error(404, 'Не найдено.')
+        except ApiError as exc:
+            return error(exc.status, exc.detail)
+    return wrapper
+
+
+def selected_fields(request, projection):
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(projection.fields)
+    names = list(dict.fromkeys(
+        name.strip() for name in fields.split(',') if name.strip()))
+    unknown = projection.unknown(names)
+    if unknown:
+        raise ApiError(400, f"Неизвестные поля: {', '.join(unknown)}.")
+    return names
+
+
+def page_limit(request, default):
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом.')
+    if not 1 <= limit <= API_MAX_LIMIT:
+        raise ApiError(400, f'limit должен быть от 1 до {API_MAX_LIMIT}.')
+    return limit
+
+
+def stream_page(request, queryset, projection, default_limit, keys=None):
+    """Потоковый ответ со страницей queryset после курсора ?cursor=.
+
+    keys — поля ключа курсора, если это не created и pk.
+    """
+    names = selected_fields(request, projection)
+    limit = page_limit(request, default_limit)
+    # База выбирается сейчас: строки читаются уже после выхода из view,
+    # когда маршрутизация запроса (core.routers) не действует.
+    queryset = queryset.using(queryset.db)
+    keys = keys or CursorPaginator.KEYS
+    paginator = CursorPaginator(
+        projection.rows(queryset, names, keys), limit, keys)
+    token = request.GET.get('cursor')
+    cursor = paginator.decode_cursor(token)
+    if token and (cursor is None or cursor[0] != paginator.NEXT):
+        raise ApiError(400, 'Неверный курсор.')
+    rows = paginator.following(cursor)[:limit + 1]
+    return StreamingHttpResponse(
+        _stream(rows, paginator, projection, names),
+        content_type='application/json',
+    )
+
+
+def _stream(rows, paginator, projection, names):
+    encoder = DjangoJSONEncoder(**JSON_PARAMS)
+    yield '{"results": ['
+    next_cursor = None
+    last = None
+    for index, row in enumerate(rows.iterator(chunk_size=paginator.per_page)):
+        if index == paginator.per_page:
+            next_cursor = paginator.encode_cursor(paginator.NEXT, last)
+            break
+        yield (',' if index else '') + encoder.encode(
+            projection.serialize(row, names))
+        last = row
+    yield '], "next": ' + encoder.encode(next_cursor) + '}'
+
+
+@api_view
+def posts(request):
+    return stream_page(request, Post.objects.all(), POSTS, POSTS_LIMIT)
+
+
+@api_view
+def group_posts(request, slug):
+    group = caching.get_group(slug)
+    return stream_page(
+        request, Post.objects.filter(group=group), POSTS, POSTS_LIMIT)
+
+
+@api_view
+def author_posts(request, username):
+    author = caching.get_author(username)
+    return stream_page(
+        request, Post.objects.filter(author=author), POSTS, POSTS_LIMIT)
+
+
+@api_view
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужна авторизация.')
+    return stream_page(
+        request, timeline.follow_feed(request.user), POSTS, POSTS_LIMIT,
+        keys=timeline.CURSOR_KEYS)
+
+
+@api_view
+def post_detail(request, post_id):
+    names = selected_fields(request, POSTS)
+    row = POSTS.rows(Post.objects.filter(pk=post_id), names).first()
+    if row is None:
+        raise Http404
+    return JsonResponse(
+        POSTS.serialize(row, names), json_dumps_params=JSON_PARAMS)
+
+
+@api_view
+def comments(request, post_id):
+    post = caching.get_post(post_id)
+    return stream_page(
+        request, Comment.objects.filter(post=post.pk), COMMENTS,
+        COMMENTS_LIMIT)
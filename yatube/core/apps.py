@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .db import configure_connection
+        from .middleware import instrument_templates
+
+        connection_created.connect(
+            configure_connection, dispatch_uid='core.db.configure_connection')
+        instrument_templates()
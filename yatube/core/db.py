@@ -0,0 +1,42 @@
+"""Настройка подключений SQLite под одновременные чтение и запись.
+
+При каждом новом подключении выполняются прагмы из SQLITE_PRAGMAS
+и из ключа PRAGMAS настроек этой базы в DATABASES, который их
+дополняет (обработчик connection_created подключается
+в CoreConfig.ready).
+В режиме WAL читатели не ждут писателя, а busy_timeout заставляет
+писателя подождать занятую базу вместо ошибки «database is locked».
+journal_mode хранится в самом файле базы, остальные прагмы действуют
+только на подключение. Вместе с CONN_MAX_AGE прагмы выполняются
+один раз на подключение, а не на каждый запрос.
+"""
+from yatube.settings import SQLITE_PRAGMAS
+
+
+def connection_pragmas(connection):
+    """Прагмы подключения: SQLITE_PRAGMAS и PRAGMAS из настроек базы."""
+    return dict(SQLITE_PRAGMAS, **connection.settings_dict.get('PRAGMAS', {}))
+
+
+def apply_pragmas(connection, pragmas=None):
+    """Выполняет прагмы SQLite на подключении connection."""
+    if pragmas is None:
+        pragmas = connection_pragmas(connection)
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def read_pragmas(connection, names=None):
+    """Текущие значения прагм, по умолчанию — настроенных для базы."""
+    values = {}
+    with connection.cursor() as cursor:
+        for name in names or connection_pragmas(connection):
+            cursor.execute(f'PRAGMA {name}')
+            values[name] = cursor.fetchone()[0]
+    return values
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection)
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from yatube.settings import DATABASE_REPLICAS
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в базы-реплики. Так на одной '
+            'машине проверяется чтение с реплик (core.routers).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            help=('Алиас реплики из DATABASES; по умолчанию все из '
+                  'DATABASE_REPLICAS. Можно указать несколько.'),
+        )
+
+    def handle(self, *args, databases, **options):
+        aliases = databases or DATABASE_REPLICAS
+        if not aliases:
+            raise CommandError(
+                'DATABASE_REPLICAS пуст: укажите реплику в --database.')
+        source = connections[DEFAULT_DB_ALIAS]
+        for alias in aliases:
+            if alias == DEFAULT_DB_ALIAS or alias not in connections:
+                raise CommandError(f'{alias} — не реплика из DATABASES.')
+            target = connections[alias]
+            if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+                raise CommandError(
+                    'Копируются только базы SQLite; настоящие реплики '
+                    'обновляет репликация самой СУБД.')
+            source.ensure_connection()
+            target.ensure_connection()
+            # Онлайн-копия: основная база доступна во время копирования
+            source.connection.backup(target.connection)
+            target.close()
+            self.stdout.write(self.style.SUCCESS(
+                f'База {DEFAULT_DB_ALIAS} скопирована в {alias}.'))
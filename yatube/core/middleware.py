@@ -0,0 +1,197 @@
+"""Замеры запроса: SQL-запросы, время базы, шаблонов и всего view.
+
+RequestTimingMiddleware считает запросы к базе через execute_wrapper
+всех подключений, а время рендера шаблонов — через обертку над
+Template.render бэкенда Django (ставится в CoreConfig.ready).
+Итог уходит в заголовок Server-Timing и строку лога core.timing
+с уровнем INFO; запросы сверх бюджета пишутся с уровнем WARNING.
+
+Потоковый ответ (StreamingHttpResponse) читает базу, пока отдается
+тело, поэтому его замеры продолжаются до response.close(): строка лога
+учитывает все запросы, а Server-Timing — только сделанные до начала
+тела.
+"""
+import logging
+import threading
+from collections import Counter
+from contextlib import ExitStack
+from functools import wraps
+from time import perf_counter
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from yatube.settings import (REPLICA_STICKY_COOKIE, REPLICA_STICKY_SECONDS,
+                             REQUEST_QUERY_BUDGET, REQUEST_TIME_BUDGET,
+                             REQUEST_TIMING)
+from . import routers
+
+logger = logging.getLogger('core.timing')
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.view_time = 0.0
+        self.statements = Counter()
+        self._template_depth = 0
+
+    @property
+    def duplicates(self):
+        """Сколько раз повторился самый частый запрос — признак N+1."""
+        if not self.statements:
+            return 0
+        return self.statements.most_common(1)[0][1]
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+
+
+def current_metrics():
+    """Замеры текущего запроса или None вне middleware."""
+    return getattr(_local, 'metrics', None)
+
+
+def instrument_templates():
+    """Оборачивает Template.render, чтобы считать время шаблонов."""
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'timed', False):
+        return
+    render = Template.render
+
+    @wraps(render)
+    def timed_render(self, *args, **kwargs):
+        metrics = current_metrics()
+        if metrics is None or metrics._template_depth:
+            return render(self, *args, **kwargs)
+        metrics._template_depth += 1
+        start = perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            metrics.template_time += perf_counter() - start
+            metrics._template_depth -= 1
+
+    timed_render.timed = True
+    Template.render = timed_render
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+class _Finish:
+    """Объект для response._closable_objects: close() вызывает func."""
+
+    def __init__(self, func):
+        self.close = func
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        if not REQUEST_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        _local.metrics = metrics
+        start = perf_counter()
+        stack = ExitStack()
+        try:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        except BaseException:
+            self.finish(stack, metrics, start)
+            raise
+        if response.streaming:
+            # Тело потокового ответа читает базу уже после выхода
+            # из middleware, поэтому замеры идут до response.close().
+            # В Server-Timing попадает только часть до начала тела.
+            response['Server-Timing'] = self.server_timing(
+                metrics, perf_counter() - start)
+            response._closable_objects.append(_Finish(
+                lambda: self.finish(stack, metrics, start, request, response)))
+            return response
+        self.finish(stack, metrics, start)
+        response['Server-Timing'] = self.server_timing(
+            metrics, metrics.view_time)
+        self.log(request, response, metrics)
+        return response
+
+    def finish(self, stack, metrics, start, request=None, response=None):
+        """Снимает обертки запросов и, если передан ответ, пишет лог."""
+        stack.close()
+        metrics.view_time = perf_counter() - start
+        _local.metrics = None
+        if response is not None:
+            self.log(request, response, metrics)
+
+    def server_timing(self, metrics, view_time):
+        queries = f'{metrics.queries} queries'
+        return (
+            f'db;dur={_ms(metrics.sql_time)};desc="{queries}", '
+            f'tpl;dur={_ms(metrics.template_time)}, '
+            f'view;dur={_ms(view_time)}'
+        )
+
+    def log(self, request, response, metrics):
+        over_budget = []
+        if metrics.queries > REQUEST_QUERY_BUDGET:
+            over_budget.append('queries')
+        if _ms(metrics.view_time) > REQUEST_TIME_BUDGET:
+            over_budget.append('time')
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'duplicates': metrics.duplicates,
+            'sql_ms': _ms(metrics.sql_time),
+            'template_ms': _ms(metrics.template_time),
+            'view_ms': _ms(metrics.view_time),
+        }
+        if over_budget:
+            fields['over_budget'] = ','.join(over_budget)
+        line = ' '.join(f'{key}={value}' for key, value in fields.items())
+        level = logging.WARNING if over_budget else logging.INFO
+        logger.log(level, line, extra={'timing': fields})
+
+
+class ReplicaMiddleware:
+    """Разрешает читать с реплики запросам, которые ничего не пишут.
+
+    Запрос с записью ставит cookie, и браузер какое-то время
+    читает с основной базы (см. core.routers).
+    """
+    SAFE_METHODS = ('GET', 'HEAD')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replica = None
+        if (request.method in self.SAFE_METHODS
+                and REPLICA_STICKY_COOKIE not in request.COOKIES):
+            replica = routers.choose_replica()
+        with routers.use_replica(replica):
+            response = self.get_response(request)
+        wrote = (request.method not in self.SAFE_METHODS
+                 or getattr(request, 'wrote_primary', False))
+        if wrote and routers.DATABASE_REPLICAS:
+            response.set_cookie(
+                REPLICA_STICKY_COOKIE, '1', max_age=REPLICA_STICKY_SECONDS,
+                httponly=True)
+        return response
@@ -0,0 +1,84 @@
+"""Чтение с реплик базы и запись в основную базу.
+
+Все запросы к базе идут в default, кроме GET- и HEAD-запросов
+страниц: на время такого запроса ReplicaMiddleware разрешает читать
+с одной из реплик DATABASE_REPLICAS, выбранной на весь запрос.
+Страницы, которые пишут в базу, помечены декоратором primary_database
+и и читают, и пишут в default. После такой страницы или запроса
+с методом POST ответ ставит cookie REPLICA_STICKY_COOKIE, и следующие
+REPLICA_STICKY_SECONDS секунд этот браузер читает с default: автор
+сразу видит свою запись, даже если реплика отстает.
+
+То, что кладется в общий кэш (страницы, объекты и счетчики posts),
+всегда читается с основной базы (use_primary): иначе отставшая реплика
+закрепила бы в кэше старые данные для всех посетителей.
+
+Локально реплику заменяет второй файл SQLite (база replica
+в DATABASES): команда sync_replica копирует в него основную базу,
+а DATABASE_REPLICAS = ['replica'] включает чтение с него.
+"""
+import random
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db import DEFAULT_DB_ALIAS
+
+from yatube.settings import DATABASE_REPLICAS
+
+# Приложения, которые всегда читают с основной базы: сессия нужна
+# сразу после входа, когда реплика могла ее еще не получить
+PRIMARY_APPS = {'sessions'}
+
+_local = threading.local()
+
+
+def choose_replica():
+    """Случайная реплика или None, если реплик нет."""
+    if not DATABASE_REPLICAS:
+        return None
+    return random.choice(DATABASE_REPLICAS)
+
+
+def read_database():
+    """База для чтения в текущем потоке."""
+    return getattr(_local, 'replica', None) or DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def use_replica(alias):
+    """Читает с реплики alias внутри блока; None — с основной базы."""
+    previous = getattr(_local, 'replica', None)
+    _local.replica = alias
+    try:
+        yield
+    finally:
+        _local.replica = previous
+
+
+def use_primary():
+    return use_replica(None)
+
+
+def primary_database(view):
+    """Страница пишет в базу: все ее запросы идут в основную базу."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.wrote_primary = True
+        with use_primary():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        return read_database()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, объекты из них можно связывать
+        return True
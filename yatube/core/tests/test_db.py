@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+from unittest import skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase
+
+from ..db import read_pragmas
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Прагмы есть только в SQLite')
+class SQLitePragmasTestCase(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def connect(self, **settings):
+        """Новое подключение к базе в файле с настройками default."""
+        settings_dict = dict(
+            connection.settings_dict,
+            NAME=os.path.join(self.directory, 'db.sqlite3'),
+            **settings,
+        )
+        new_connection = type(connections['default'])(
+            settings_dict, alias='pragmas')
+        self.addCleanup(new_connection.close)
+        return new_connection
+
+    def test_pragmas_on_connect(self):
+        """Новое подключение получает WAL и остальные прагмы."""
+        self.assertEqual(read_pragmas(self.connect()), {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,
+            'busy_timeout': 5000,
+            'temp_store': 2,
+        })
+
+    def test_database_pragmas(self):
+        """PRAGMAS в настройках базы дополняют и меняют общие прагмы."""
+        pragmas = read_pragmas(self.connect(
+            PRAGMAS={'busy_timeout': 100, 'query_only': 1}))
+        self.assertEqual(pragmas['busy_timeout'], 100)
+        self.assertEqual(pragmas['query_only'], 1)
+        self.assertEqual(pragmas['journal_mode'], 'wal')
+
+
+class BenchmarkConcurrencyTestCase(TestCase):
+    def test_requires_file_database(self):
+        """Замер с писателем не запускается на базе в памяти."""
+        with self.assertRaises(CommandError):
+            call_command('benchmark_concurrency', duration=0)
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class RequestTimingTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Timed')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        Comment.objects.create(post=cls.post, author=cls.user, text='Ответ')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def timing(self, response):
+        return dict(
+            part.strip().split(';', 1)
+            for part in response['Server-Timing'].split(',')
+        )
+
+    def test_server_timing_header(self):
+        """Ответ содержит время базы, шаблонов и view."""
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            response = self.authorized_client.get(
+                reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertEqual(set(self.timing(response)), {'db', 'tpl', 'view'})
+        self.assertRegex(self.timing(response)['db'], r'desc="[1-9]\d* ')
+        self.assertRegex(
+            logs.output[0], r'path=/posts/\d+/ status=200 queries=[1-9]')
+        self.assertNotIn('over_budget', logs.output[0])
+
+    def test_query_count(self):
+        """Число запросов в логе совпадает с выполненными запросами."""
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                self.authorized_client.get(url)
+        self.assertEqual(logs.records[0].timing['queries'], len(queries))
+
+    def test_streaming_query_count(self):
+        """Запросы потокового ответа считаются до его закрытия."""
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.authorized_client.get(
+                    reverse('api:posts'))
+                self.assertTrue(response.streaming)
+                self.assertEqual(logs.records, [])
+                b''.join(response.streaming_content)
+        self.assertGreater(len(queries), 0)
+        self.assertEqual(logs.records[0].timing['queries'], len(queries))
+        self.assertEqual(response.status_code, 200)
+
+    def test_over_budget(self):
+        """Запрос сверх бюджета пишется в лог как предупреждение."""
+        with mock.patch('core.middleware.REQUEST_QUERY_BUDGET', 0):
+            with self.assertLogs('core.timing', 'WARNING') as logs:
+                self.authorized_client.get(reverse('posts:index'))
+        self.assertIn('over_budget=queries', logs.output[0])
+        self.assertGreater(logs.records[0].timing['template_ms'], 0)
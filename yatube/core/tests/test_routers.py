@@ -0,0 +1,132 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+from yatube.settings import REPLICA_STICKY_COOKIE
+from .. import routers
+
+User = get_user_model()
+
+
+def run_on_commit(func):
+    func()
+
+
+@mock.patch.object(routers, 'DATABASE_REPLICAS', ['replica'])
+class ReplicaRoutingTestCase(TestCase):
+    """Основная база и реплика — две отдельные тестовые базы SQLite."""
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Primary')
+        cls.reader = User.objects.create_user(username='Reader')
+        # «Репликация» пользователей и поста, который есть в обеих базах
+        User.objects.using('replica').bulk_create([cls.author, cls.reader])
+        cls.group = Group.objects.create(title='Группа', slug='replicated')
+        Group.objects.using('replica').bulk_create([cls.group])
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Общий пост')
+        Post.objects.using('replica').bulk_create([cls.post])
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_feeds_read_replica(self):
+        """Страницы лент читают с реплики и не видят неотраженных записей."""
+        Post.objects.create(author=self.author, text='Еще не в реплике')
+        pages = [
+            reverse('posts:profile', kwargs={'username': 'Primary'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+        for url in pages:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertContains(response, 'Общий пост')
+                self.assertNotContains(response, 'Еще не в реплике')
+                self.assertNotIn(REPLICA_STICKY_COOKIE, response.cookies)
+
+    def test_writes_go_to_primary(self):
+        """Новый пост пишется в основную базу и не попадает в реплику."""
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'Свежий пост'})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Post.objects.filter(text='Свежий пост').exists())
+        self.assertFalse(
+            Post.objects.using('replica').filter(text='Свежий пост').exists())
+
+    def test_read_your_writes(self):
+        """После записи браузер читает с основной базы и видит свой пост."""
+        self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'Свежий пост'})
+        self.assertIn(REPLICA_STICKY_COOKIE, self.authorized_client.cookies)
+        profile = reverse('posts:profile', kwargs={'username': 'Reader'})
+        response = self.authorized_client.get(profile)
+        self.assertContains(response, 'Свежий пост')
+        other_client = Client()
+        other_client.force_login(self.author)
+        response = other_client.get(profile)
+        self.assertNotContains(response, 'Свежий пост')
+
+    @mock.patch('django.db.transaction.on_commit', run_on_commit)
+    def test_cache_filled_from_primary(self):
+        """Общий кэш заполняется с основной базы, а не с реплики."""
+        pages = [
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'Primary'}),
+            reverse('posts:group_list', kwargs={'slug': 'replicated'}),
+        ]
+        for url in pages:
+            self.client.get(url)
+        Post.objects.create(
+            author=self.author, group=self.group, text='Еще не в реплике')
+        for url in pages:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Еще не в реплике')
+                self.assertEqual(
+                    response.context['page_obj'].paginator.count, 2)
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Еще не в реплике')
+
+    def test_follow_is_sticky(self):
+        """Подписка по GET пишет в основную базу и ставит cookie."""
+        response = self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'Primary'}))
+        self.assertIn(REPLICA_STICKY_COOKIE, response.cookies)
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author).exists())
+
+    def test_router(self):
+        """Вне запросов страниц чтение и запись идут в основную базу."""
+        router = routers.ReplicaRouter()
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+        with routers.use_replica('replica'):
+            self.assertEqual(router.db_for_read(Post), 'replica')
+            self.assertEqual(router.db_for_write(Post), 'default')
+            with routers.use_primary():
+                self.assertEqual(router.db_for_read(Post), 'default')
+        replica_post = Post.objects.using('replica').get(pk=self.post.pk)
+        self.assertTrue(router.allow_relation(replica_post, self.author))
+
+
+class NoReplicasTestCase(TestCase):
+    def test_reads_primary(self):
+        """Без реплик страницы читают с основной базы и cookie не ставят."""
+        cache.clear()
+        user = User.objects.create_user(username='Solo')
+        Post.objects.create(author=user, text='Единственная база')
+        self.assertContains(
+            self.client.get(reverse('posts:index')), 'Единственная база')
+        client = Client()
+        client.force_login(user)
+        response = client.post(
+            reverse('posts:post_create'), {'text': 'Еще пост'})
+        self.assertNotIn(REPLICA_STICKY_COOKIE, response.cookies)
@@ -1,9 +1,21 @@
 from django.contrib import admin
 
-from .models import Comment, Group, Post, Follow
+from . import search
+from .models import Comment, Group, Post, Follow, UserStats
 
 
-class PostAdmin(admin.ModelAdmin):
+class IndexedSearchMixin:
+    """Поиск по полнотекстовому индексу вместо LIKE '%слово%'."""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return super().get_search_results(
+                request, queryset, search_term)
+        found = search.search(self.model, search_term)
+        return queryset.filter(pk__in=found), False
+
+
+class PostAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'text',
@@ -21,7 +33,7 @@ class GroupAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("title",)}
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         'post',
         'author',
@@ -42,7 +54,18 @@ class FollowAdmin(admin.ModelAdmin):
     list_filter = ('created',)
 
 
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        'user',
+        'post_count',
+        'follower_count',
+        'following_count',
+        'comment_count',
+    )
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(UserStats, UserStatsAdmin)
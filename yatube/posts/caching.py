@@ -0,0 +1,208 @@
+"""Кэширование страниц и объектов приложения posts.
+
+Версия — случайная метка в кэше. Она входит в ключи кэша страниц
+и меняется сигналами при изменении данных, поэтому старые записи
+просто перестают читаться и истекают сами, а TTL можно держать большим.
+Случайная метка, в отличие от счетчика, не повторится после вытеснения
+ключа версии из кэша.
+
+Страницы для анонимных пользователей кэшируются целиком
+(cache_anonymous_page), ленты RSS и Atom — для всех (cache_shared_page),
+а группы, пользователи и посты, которые views
+ищут по slug, username и id, — как отдельные объекты.
+
+Все, что попадает в кэш, читается с основной базы (core.routers):
+версия меняется сразу после записи, и отстающая реплика записала бы
+под новой версией старые данные для всех посетителей.
+"""
+from functools import wraps
+from hashlib import md5
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.http import Http404
+
+from core.routers import use_primary
+from yatube.settings import OBJECT_CACHE_TIMEOUT, PAGE_CACHE_TIMEOUT
+from .models import Group, Post, User
+
+FEED_VERSION_KEY = 'posts:version:feed'
+GROUP_VERSION_KEY = 'posts:version:group:{}'
+AUTHOR_VERSION_KEY = 'posts:version:author:{}'
+POST_VERSION_KEY = 'posts:version:post:{}'
+
+GROUP_KEY = 'posts:group:{}'
+GROUP_ID_KEY = 'posts:group_id:{}'
+USER_KEY = 'posts:user:{}'
+POST_KEY = 'posts:post:{}'
+PAGE_KEY = 'posts:page:{}'
+# Поля пользователя, которые кэшируются вместе с автором: в кэш
+# не попадают хэш пароля, email и прочие личные данные
+AUTHOR_FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+
+def version(key):
+    """Текущая версия по ключу; создается при первом обращении."""
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, uuid4().hex, None)
+        value = cache.get(key)
+    return value
+
+
+def bump(*keys):
+    """Выдает новые версии, делая устаревшими связанные записи кэша."""
+    cache.set_many({key: uuid4().hex for key in keys}, None)
+
+
+def feed_version():
+    return version(FEED_VERSION_KEY)
+
+
+def bump_feed():
+    bump(FEED_VERSION_KEY)
+
+
+def hashed(value):
+    """Значение из URL, пригодное для ключа любого бэкенда кэша."""
+    return md5(str(value).encode()).hexdigest()
+
+
+def _get_object(key, queryset, **lookup):
+    obj = cache.get(key)
+    if obj is None:
+        with use_primary():
+            obj = queryset.filter(**lookup).first()
+        if obj is None:
+            raise Http404(f'{queryset.model._meta.object_name} not found.')
+        cache.set(key, obj, OBJECT_CACHE_TIMEOUT)
+    return obj
+
+
+def get_group(slug):
+    """Группа по slug, как get_object_or_404, но через кэш."""
+    return _get_object(
+        GROUP_KEY.format(hashed(slug)), Group.objects, slug=slug)
+
+
+def get_author(username):
+    """Пользователь по username, как get_object_or_404, но через кэш."""
+    return _get_object(
+        USER_KEY.format(hashed(username)),
+        User.objects.only(*AUTHOR_FIELDS), username=username,
+    )
+
+
+def _get_group_by_id(group_id):
+    key = GROUP_ID_KEY.format(group_id)
+    group = cache.get(key)
+    if group is None:
+        with use_primary():
+            group = Group.objects.filter(pk=group_id).first()
+        if group is not None:
+            cache.set(key, group, OBJECT_CACHE_TIMEOUT)
+    return group
+
+
+def get_post(post_id):
+    """Пост с автором и группой по id, как get_object_or_404.
+
+    У автора загружаются только AUTHOR_FIELDS. Группа кэшируется
+    отдельно от поста, чтобы ее переименование не оставляло в постах
+    старые название и slug.
+    """
+    private = [
+        f'author__{field.name}' for field in User._meta.concrete_fields
+        if field.name not in AUTHOR_FIELDS
+    ]
+    post = _get_object(
+        POST_KEY.format(post_id),
+        Post.objects.select_related('author').defer(*private), pk=post_id,
+    )
+    if post.group_id is not None:
+        post.group = _get_group_by_id(post.group_id)
+    return post
+
+
+def forget_group(slug, group_id=None):
+    cache.delete(GROUP_KEY.format(hashed(slug)))
+    if group_id is not None:
+        cache.delete(GROUP_ID_KEY.format(group_id))
+
+
+def forget_author(username):
+    cache.delete(USER_KEY.format(hashed(username)))
+
+
+def forget_post(post_id):
+    cache.delete(POST_KEY.format(post_id))
+
+
+def forget_author_posts(author_id):
+    """Сбрасывает посты автора: автор закэширован вместе с ними."""
+    post_ids = Post.objects.filter(author_id=author_id).values_list(
+        'pk', flat=True)
+    cache.delete_many([POST_KEY.format(pk) for pk in post_ids])
+
+
+def feed_versions(request):
+    return [FEED_VERSION_KEY]
+
+
+def group_versions(request, slug):
+    return [GROUP_VERSION_KEY.format(get_group(slug).pk)]
+
+
+def profile_versions(request, username):
+    return [AUTHOR_VERSION_KEY.format(get_author(username).pk)]
+
+
+def post_versions(request, post_id):
+    post = get_post(post_id)
+    keys = [
+        POST_VERSION_KEY.format(post.pk),
+        AUTHOR_VERSION_KEY.format(post.author_id),
+    ]
+    if post.group_id is not None:
+        keys.append(GROUP_VERSION_KEY.format(post.group_id))
+    return keys
+
+
+def cache_shared_page(version_keys):
+    """Кэширует ответ view на GET-запрос, одинаковый для всех.
+
+    version_keys(request, *args, **kwargs) возвращает ключи версий,
+    от которых зависит страница; смена любой из них сбрасывает кэш.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+            keys = version_keys(request, *args, **kwargs)
+            versions = ':'.join(version(key) for key in keys)
+            raw = f'{view.__name__}:{request.get_full_path()}:{versions}'
+            key = PAGE_KEY.format(hashed(raw))
+            response = cache.get(key)
+            if response is None:
+                with use_primary():
+                    response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    cache.set(key, response, PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+def cache_anonymous_page(version_keys):
+    """Как cache_shared_page, но только для анонимных пользователей."""
+    def decorator(view):
+        cached = cache_shared_page(version_keys)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            return cached(request, *args, **kwargs)
+        return wrapper
+    return decorator
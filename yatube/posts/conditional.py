@@ -0,0 +1,139 @@
+"""Условные GET-запросы страниц постов: ETag и Last-Modified.
+
+Валидаторы считаются до рендера страницы, и на совпавший
+If-None-Match или If-Modified-Since страница отвечает 304 без тела.
+ETag собирается из версий кэша (caching), которые меняются при любом
+изменении данных страницы, включая удаление постов и подписки,
+и из пользователя: авторизованным страницы показываются по-разному.
+Last-Modified — наибольший modified поста и его комментариев или
+постов ленты: один запрос MAX по индексу, результат которого кэшируется
+до смены тех же версий. Django сначала проверяет If-None-Match,
+поэтому изменения, которые не двигают modified, клиент с ETag все
+равно увидит.
+
+Ленты RSS и Atom одинаковы для всех пользователей, поэтому их ETag
+зависит только от версий, а Last-Modified — наибольший modified
+постов, попавших в ленту: его же ставит в ответ сама лента.
+"""
+from django.core.cache import cache
+from django.db.models import Max
+from django.views.decorators.http import condition
+
+from core.routers import use_primary
+from yatube.settings import FEED_ITEMS_LIMIT, PAGE_CACHE_TIMEOUT
+from . import caching
+from .models import Comment, Post
+
+LAST_MODIFIED_KEY = 'posts:last_modified:{}'
+FEED_LAST_MODIFIED_KEY = 'posts:feed_last_modified:{}'
+
+
+def _versions(keys):
+    return ':'.join(caching.version(key) for key in keys)
+
+
+def _etag(request, keys):
+    user = request.user.pk if request.user.is_authenticated else ''
+    return caching.hashed(f'{_versions(keys)}:{user}')
+
+
+def _cached(keys, compute, cache_key=LAST_MODIFIED_KEY):
+    """Last-Modified, закэшированный до смены версий keys."""
+    key = cache_key.format(caching.hashed(_versions(keys)))
+    value = cache.get(key)
+    if value is None:
+        with use_primary():
+            value = compute()
+        cache.set(key, value, PAGE_CACHE_TIMEOUT)
+    return value
+
+
+def _latest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def _last_modified(queryset):
+    return queryset.aggregate(last=Max('modified'))['last']
+
+
+def post_etag(request, post_id):
+    return _etag(request, caching.post_versions(request, post_id))
+
+
+def post_last_modified(request, post_id):
+    post = caching.get_post(post_id)
+    comments = Comment.objects.filter(post_id=post.pk)
+    return _cached(
+        caching.post_versions(request, post_id),
+        lambda: _latest(post.modified, _last_modified(comments)))
+
+
+def group_etag(request, slug):
+    return _etag(request, caching.group_versions(request, slug))
+
+
+def group_last_modified(request, slug):
+    posts = Post.objects.filter(group_id=caching.get_group(slug).pk)
+    return _cached(
+        caching.group_versions(request, slug),
+        lambda: _last_modified(posts))
+
+
+def profile_etag(request, username):
+    return _etag(request, caching.profile_versions(request, username))
+
+
+def profile_last_modified(request, username):
+    posts = Post.objects.filter(author_id=caching.get_author(username).pk)
+    return _cached(
+        caching.profile_versions(request, username),
+        lambda: _last_modified(posts))
+
+
+def _feed_etag(keys):
+    return caching.hashed(f'feed:{_versions(keys)}')
+
+
+def _feed_last_modified(keys, posts):
+    latest = posts.order_by('-created', '-pk')[:FEED_ITEMS_LIMIT]
+    return _cached(
+        keys, lambda: _last_modified(latest), FEED_LAST_MODIFIED_KEY)
+
+
+def index_feed_etag(request):
+    return _feed_etag(caching.feed_versions(request))
+
+
+def index_feed_last_modified(request):
+    return _feed_last_modified(
+        caching.feed_versions(request), Post.objects.all())
+
+
+def group_feed_etag(request, slug):
+    return _feed_etag(caching.group_versions(request, slug))
+
+
+def group_feed_last_modified(request, slug):
+    return _feed_last_modified(
+        caching.group_versions(request, slug),
+        Post.objects.filter(group_id=caching.get_group(slug).pk))
+
+
+def profile_feed_etag(request, username):
+    return _feed_etag(caching.profile_versions(request, username))
+
+
+def profile_feed_last_modified(request, username):
+    return _feed_last_modified(
+        caching.profile_versions(request, username),
+        Post.objects.filter(author_id=caching.get_author(username).pk))
+
+
+post_condition = condition(post_etag, post_last_modified)
+group_condition = condition(group_etag, group_last_modified)
+profile_condition = condition(profile_etag, profile_last_modified)
+index_feed_condition = condition(index_feed_etag, index_feed_last_modified)
+group_feed_condition = condition(group_feed_etag, group_feed_last_modified)
+profile_feed_condition = condition(
+    profile_feed_etag, profile_feed_last_modified)
@@ -0,0 +1,119 @@
+"""Кэш количества постов в лентах.
+
+Счетчики лежат в кэше и поддерживаются сигналами (см. signals.py):
+создание поста увеличивает, удаление уменьшает. Если счетчика нет,
+он считается заново; для всей таблицы при большом размере вместо
+COUNT(*) берется оценка. Количество постов в ленте подписок считается
+по тем же строкам, что и сама лента (timeline.follow_feed): записи
+ленты читателя и все посты авторов, которые не раскладываются.
+Счетчики считаются по основной базе, а не по отстающей реплике.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Max
+
+from core.routers import use_primary
+from yatube.settings import (POSTS_COUNT_ESTIMATE_THRESHOLD,
+                             POSTS_COUNT_TIMEOUT)
+from . import timeline
+from .models import Post
+
+ALL_KEY = 'posts:count:all'
+GROUP_KEY = 'posts:count:group:{}'
+AUTHOR_KEY = 'posts:count:author:{}'
+
+
+def estimated_count(model):
+    """Быстрая оценка количества строк без полного прохода по таблице."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return max(row[0], 0) if row else 0
+    # Максимальный первичный ключ берется из индекса и не меньше числа строк.
+    return model.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+def _cached(key, queryset):
+    count = cache.get(key)
+    if count is None:
+        with use_primary():
+            count = queryset.count()
+        cache.set(key, count, POSTS_COUNT_TIMEOUT)
+    return count
+
+
+def posts_count():
+    count = cache.get(ALL_KEY)
+    if count is None:
+        with use_primary():
+            count = estimated_count(Post)
+            if count < POSTS_COUNT_ESTIMATE_THRESHOLD:
+                count = Post.objects.count()
+        cache.set(ALL_KEY, count, POSTS_COUNT_TIMEOUT)
+    return count
+
+
+def group_posts_count(group_id):
+    return _cached(
+        GROUP_KEY.format(group_id), Post.objects.filter(group_id=group_id))
+
+
+def author_posts_count(author_id):
+    return _cached(
+        AUTHOR_KEY.format(author_id), Post.objects.filter(author_id=author_id))
+
+
+def authors_posts_count(author_ids):
+    """Счетчики постов авторов; недостающие — одним запросом GROUP BY."""
+    keys = {AUTHOR_KEY.format(pk): pk for pk in author_ids}
+    cached = cache.get_many(keys)
+    counts = {keys[key]: count for key, count in cached.items()}
+    missing = [pk for key, pk in keys.items() if key not in cached]
+    if missing:
+        # order_by() убирает сортировку Meta.ordering из GROUP BY
+        rows = Post.objects.filter(author_id__in=missing).order_by().values(
+            'author_id').annotate(count=Count('pk'))
+        with use_primary():
+            found = {row['author_id']: row['count'] for row in rows}
+        found = {pk: found.get(pk, 0) for pk in missing}
+        cache.set_many(
+            {AUTHOR_KEY.format(pk): count for pk, count in found.items()},
+            POSTS_COUNT_TIMEOUT)
+        counts.update(found)
+    return counts
+
+
+def follow_posts_count(user_id):
+    celebrity_ids = timeline.followed_celebrities(user_id)
+    return timeline.entries_count(user_id, celebrity_ids) + sum(
+        authors_posts_count(celebrity_ids).values())
+
+
+def _change(key, delta):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Счетчика нет в кэше: он будет посчитан при следующем чтении.
+        pass
+
+
+def post_added(post, delta=1):
+    _change(ALL_KEY, delta)
+    _change(AUTHOR_KEY.format(post.author_id), delta)
+    if post.group_id is not None:
+        _change(GROUP_KEY.format(post.group_id), delta)
+
+
+def post_removed(post):
+    post_added(post, delta=-1)
+
+
+def post_regrouped(old_group_id, new_group_id):
+    if old_group_id is not None:
+        _change(GROUP_KEY.format(old_group_id), -1)
+    if new_group_id is not None:
+        _change(GROUP_KEY.format(new_group_id), 1)
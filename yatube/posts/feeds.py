@@ -0,0 +1,143 @@
+"""Ленты RSS и Atom: все посты, посты группы и посты автора.
+
+Ответ ленты кэшируется целиком (cache_shared_page) до смены версий
+кэша, которые сигналы Post меняют при любом изменении постов, поэтому
+лента собирается заново только после изменений. Поверх кэша
+проверяются ETag и Last-Modified (conditional): опрашивающие ленту
+читатели без изменений получают 304 без тела.
+"""
+from django.contrib.syndication.views import Feed
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from yatube.settings import FEED_ITEMS_LIMIT
+from . import caching, conditional
+from .models import Post
+
+# Длина заголовка записи ленты, символов
+ITEM_TITLE_LENGTH = 50
+
+
+class LatestPostsFeed(Feed):
+    """Последние посты сайта в RSS."""
+
+    title = 'Yatube: последние обновления'
+    description = 'Последние посты на сайте.'
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def posts(self, obj):
+        return Post.objects.for_feed()
+
+    def items(self, obj):
+        return self.posts(obj).order_by(
+            '-created', '-pk')[:FEED_ITEMS_LIMIT]
+
+    def item_title(self, post):
+        return Truncator(post.text).chars(ITEM_TITLE_LENGTH)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=[post.pk])
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_pubdate(self, post):
+        return post.created
+
+    def item_updateddate(self, post):
+        return post.modified
+
+    def item_categories(self, post):
+        return [post.group.title] if post.group_id else []
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    """Последние посты группы."""
+
+    def get_object(self, request, slug):
+        return caching.get_group(slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=[group.slug])
+
+    def posts(self, group):
+        return super().posts(group).filter(group=group)
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    """Последние посты автора."""
+
+    def get_object(self, request, username):
+        return caching.get_author(username)
+
+    def title(self, author):
+        return f'Yatube: посты {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Последние посты пользователя {author.username}.'
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+    def posts(self, author):
+        return super().posts(author).filter(author=author)
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return self.description(group)
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.description(author)
+
+
+def feed_view(feed, condition, version_keys):
+    """View ленты с кэшем ответа и условными GET-запросами."""
+    @condition
+    @caching.cache_shared_page(version_keys)
+    def view(request, *args, **kwargs):
+        return feed(request, *args, **kwargs)
+    return view
+
+
+index_rss = feed_view(
+    LatestPostsFeed(), conditional.index_feed_condition,
+    caching.feed_versions)
+index_atom = feed_view(
+    LatestPostsAtomFeed(), conditional.index_feed_condition,
+    caching.feed_versions)
+group_rss = feed_view(
+    GroupPostsFeed(), conditional.group_feed_condition,
+    caching.group_versions)
+group_atom = feed_view(
+    GroupPostsAtomFeed(), conditional.group_feed_condition,
+    caching.group_versions)
+profile_rss = feed_view(
+    AuthorPostsFeed(), conditional.profile_feed_condition,
+    caching.profile_versions)
+profile_atom = feed_view(
+    AuthorPostsAtomFeed(), conditional.profile_feed_condition,
+    caching.profile_versions)
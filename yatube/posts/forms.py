@@ -1,7 +1,58 @@
+import os
+from tempfile import SpooledTemporaryFile
+
 from django import forms
+from django.core.files import File
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
 
+from yatube.settings import (FILE_UPLOAD_MAX_MEMORY_SIZE, IMAGE_FORMAT,
+                             IMAGE_MAX_PIXELS, IMAGE_MAX_SIDE,
+                             IMAGE_MAX_UPLOAD_SIZE, IMAGE_QUALITY)
 from .models import Comment, Post
 
+# Расширение и параметры сохранения для форматов перекодирования
+IMAGE_FORMATS = {
+    'WEBP': ('webp', {'method': 4}),
+    'JPEG': ('jpg', {'optimize': True, 'progressive': True}),
+}
+
+
+def process_image(upload):
+    """Перекодирует загруженную картинку.
+
+    Поворачивает ее по EXIF, уменьшает до IMAGE_MAX_SIDE по большей
+    стороне и сохраняет в IMAGE_FORMAT без метаданных; результат
+    держится в памяти, пока не превысит FILE_UPLOAD_MAX_MEMORY_SIZE.
+    GIF возвращается без изменений. Возвращает файл, ширину и высоту.
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    if image.format == 'GIF':
+        upload.seek(0)
+        return upload, image.width, image.height
+    extension, options = IMAGE_FORMATS[IMAGE_FORMAT]
+    # JPEG сразу декодируется в уменьшенном масштабе, экономя память.
+    image.draft('RGB', (IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (
+        image.mode == 'P' and 'transparency' in image.info)
+    if IMAGE_FORMAT == 'WEBP' and has_alpha:
+        image = image.convert('RGBA')
+    else:
+        image = image.convert('RGB')
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    output = File(
+        SpooledTemporaryFile(max_size=FILE_UPLOAD_MAX_MEMORY_SIZE),
+        name=f'{name}.{extension}',
+    )
+    image.save(output.file, IMAGE_FORMAT, quality=IMAGE_QUALITY, **options)
+    output.size = output.file.tell()
+    output.seek(0)
+    return output, image.width, image.height
+
 
 class PostForm(forms.ModelForm):
     class Meta:
@@ -12,6 +63,29 @@ class PostForm(forms.ModelForm):
             'image'
         )
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if image is False:
+            # Картинку убрали: ее размеры больше не действительны.
+            self.instance.image_width = None
+            self.instance.image_height = None
+            self.instance.image_size = None
+        if not isinstance(image, UploadedFile):
+            return image
+        if image.size > IMAGE_MAX_UPLOAD_SIZE:
+            raise forms.ValidationError(
+                'Картинка больше %(limit)s.',
+                params={'limit': filesizeformat(IMAGE_MAX_UPLOAD_SIZE)},
+            )
+        width, height = image.image.size
+        if width * height > IMAGE_MAX_PIXELS:
+            raise forms.ValidationError('Слишком большое разрешение.')
+        image, width, height = process_image(image)
+        self.instance.image_width = width
+        self.instance.image_height = height
+        self.instance.image_size = image.size
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
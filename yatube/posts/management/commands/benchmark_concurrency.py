@@ -0,0 +1,167 @@
+import json
+import threading
+from statistics import median
+from time import perf_counter, sleep
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.utils import timezone
+
+from core.db import apply_pragmas, connection_pragmas, read_pragmas
+from posts.models import Comment, Post, User
+from yatube.settings import POSTS_LIMIT
+from .benchmark_views import git_commit, percentile
+
+WRITER_USERNAME = 'benchmark_writer'
+
+
+def parse_pragma(value):
+    name, sep, setting = value.partition('=')
+    if not sep or not name.isidentifier():
+        raise ValueError(value)
+    return name, setting
+
+
+class Worker(threading.Thread):
+    """Поток со своим подключением: повторяет operation до stop."""
+
+    def __init__(self, operation, stop):
+        super().__init__(daemon=True)
+        self.operation = operation
+        self.stop = stop
+        self.timings = []
+        self.errors = 0
+
+    def run(self):
+        try:
+            while not self.stop.is_set():
+                start = perf_counter()
+                try:
+                    self.operation()
+                except OperationalError:
+                    # «database is locked» и прочие отказы базы
+                    self.errors += 1
+                    continue
+                self.timings.append((perf_counter() - start) * 1000)
+        finally:
+            connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ('Замеряет пропускную способность чтения ленты, пока другой '
+            'поток создает посты и комментарии, и пишет отчет в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='Сколько потоков читают главную ленту.',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Длительность каждого замера, секунды.',
+        )
+        parser.add_argument(
+            '--pragma', action='append', default=[], type=parse_pragma,
+            metavar='NAME=VALUE',
+            help=('Прагма SQLite поверх SQLITE_PRAGMAS на время замеров, '
+                  'например journal_mode=delete для сравнения с WAL. '
+                  'Можно указать несколько.'),
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл отчета; по умолчанию отчет выводится в stdout.',
+        )
+
+    def handle(self, *args, readers, duration, pragma, output, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Замер рассчитан на SQLite.')
+        if connection.is_in_memory_db():
+            raise CommandError('Нужна база в файле, а не в памяти.')
+        pragmas = dict(pragma)
+        writer, _ = User.objects.get_or_create(username=WRITER_USERNAME)
+        self.writer = writer
+        self.post = Post.objects.create(
+            author=writer, text='Пост для замера записи')
+        # Подключения потоков создаются с теми же настройками базы,
+        # поэтому прагмы из PRAGMAS выполняются и на них.
+        connection.settings_dict['PRAGMAS'] = pragmas
+        connection.close()
+        try:
+            configured = connection_pragmas(connection)
+            effective = read_pragmas(connection)
+            results = {
+                'idle': self.measure(readers, duration, False),
+                'writer_active': self.measure(readers, duration, True),
+            }
+        finally:
+            del connection.settings_dict['PRAGMAS']
+            connection.close()
+            # journal_mode хранится в файле базы: возвращаем настройки
+            apply_pragmas(connection)
+            writer.delete()
+        for name, result in results.items():
+            self.stderr.write(
+                f"{name}: чтений {result['reads_per_second']}/с, "
+                f"p99 {result['read_p99_ms']} мс, "
+                f"записей {result['writes_per_second']}/с, "
+                f"ошибок {result['errors']}"
+            )
+        report = {
+            'commit': git_commit(),
+            'created': timezone.now().isoformat(),
+            'options': {'readers': readers, 'duration': duration},
+            'pragmas': effective,
+            'configured_pragmas': configured,
+            'results': results,
+        }
+        data = json.dumps(report, ensure_ascii=False, indent=2)
+        if output == '-':
+            self.stdout.write(data)
+        else:
+            with open(output, 'w', encoding='utf-8') as file:
+                file.write(data + '\n')
+            self.stderr.write(self.style.SUCCESS(
+                f'Отчет записан в {output}.'))
+
+    def read(self):
+        list(Post.objects.for_feed()[:POSTS_LIMIT])
+
+    def write(self):
+        """Как post_create и add_comment: пост и комментарий.
+
+        Счетчики обновляют сигналы сохранения.
+        """
+        Post.objects.create(author=self.writer, text='Замер записи')
+        Comment.objects.create(
+            post=self.post, author=self.writer, text='Замер записи')
+
+    def measure(self, readers, duration, with_writer):
+        stop = threading.Event()
+        reader_threads = [Worker(self.read, stop) for _ in range(readers)]
+        threads = list(reader_threads)
+        writer_thread = None
+        if with_writer:
+            writer_thread = Worker(self.write, stop)
+            threads.append(writer_thread)
+        for thread in threads:
+            thread.start()
+        sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        timings = [
+            timing for thread in reader_threads for timing in thread.timings]
+        writes = len(writer_thread.timings) if writer_thread else 0
+        return {
+            'reads': len(timings),
+            'reads_per_second': round(len(timings) / duration, 1),
+            'read_p50_ms': round(median(timings), 2) if timings else None,
+            'read_p99_ms': (
+                round(percentile(timings, 0.99), 2) if timings else None),
+            'writes': writes,
+            'writes_per_second': round(writes / duration, 1),
+            'write_p99_ms': (
+                round(percentile(writer_thread.timings, 0.99), 2)
+                if writes else None),
+            'errors': sum(thread.errors for thread in threads),
+        }
@@ -0,0 +1,223 @@
+import json
+import subprocess
+from statistics import median
+from time import perf_counter
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import timeline
+from posts.models import Comment, Follow, Group, Post, User, UserStats
+from posts.seed import seed_dataset
+from posts.utils import CursorPaginator
+from yatube.settings import (COMMENTS_LIMIT, POSTS_CURSOR_PAGINATION,
+                             POSTS_LIMIT)
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу: percentile(values, 0.99)."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время ответа и число SQL-запросов страниц posts '
+            'на первой и на дальней странице и пишет отчет в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', action='store_true',
+            help='Перед замерами заполнить базу синтетическими данными.',
+        )
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=50_000)
+        parser.add_argument('--follows', type=int, default=20_000)
+        parser.add_argument('--comments', type=int, default=100_000)
+        parser.add_argument(
+            '--random-seed', type=int, default=0,
+            help='Один и тот же seed дает один и тот же набор данных.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Сколько раз запрашивать каждую страницу.',
+        )
+        parser.add_argument(
+            '--deep-page', type=int, default=100,
+            help='Номер дальней страницы лент и комментариев.',
+        )
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не очищать кэш перед каждым запросом.',
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл отчета; по умолчанию отчет выводится в stdout.',
+        )
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            seed_dataset(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+                follows=options['follows'],
+                comments=options['comments'],
+                seed=options['random_seed'],
+                stdout=self.stderr,
+            )
+        self.deep_page = options['deep_page']
+        client = Client()
+        reader = self.busiest_reader()
+        client.force_login(reader)
+        results = {}
+        for name, url, params in self.cases(reader):
+            results[name] = self.measure(
+                client, url, params, options['requests'], options['warm'])
+            self.stderr.write(
+                f"{name}: p50 {results[name]['p50_ms']} мс, "
+                f"p99 {results[name]['p99_ms']} мс, "
+                f"запросов {results[name]['queries']}"
+            )
+        report = {
+            'commit': git_commit(),
+            'created': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'dataset': {
+                'users': User.objects.count(),
+                'groups': Group.objects.count(),
+                'posts': Post.objects.count(),
+                'follows': Follow.objects.count(),
+                'comments': Comment.objects.count(),
+            },
+            'options': {
+                'requests': options['requests'],
+                'deep_page': self.deep_page,
+                'warm': options['warm'],
+                'cursor_pagination': POSTS_CURSOR_PAGINATION,
+            },
+            'results': results,
+        }
+        data = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(data)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(data + '\n')
+            self.stderr.write(self.style.SUCCESS(
+                f"Отчет записан в {options['output']}."))
+
+    def busiest_reader(self):
+        stats = UserStats.objects.select_related('user').order_by(
+            '-following_count').first()
+        if stats is None:
+            raise CommandError(
+                'В базе нет пользователей: запустите команду с --seed '
+                'или rebuild_stats.')
+        return stats.user
+
+    def page_params(self, queryset, per_page, page, cursor):
+        """Параметры запроса для страницы page: ?page= или ?cursor=."""
+        if page == 1:
+            return {}
+        if not cursor:
+            return {'page': page}
+        obj = queryset.order_by('-created', '-pk')[
+            (page - 1) * per_page - 1:].first()
+        if obj is None:
+            return {}
+        paginator = CursorPaginator(queryset, per_page)
+        return {'cursor': paginator.encode_cursor(paginator.NEXT, obj)}
+
+    def cases(self, reader):
+        """Имя замера, адрес и параметры для первой и дальней страницы."""
+        group = Group.objects.annotate(total=Count('posts')).order_by(
+            '-total').first()
+        author = UserStats.objects.select_related('user').order_by(
+            '-post_count').first().user
+        post = Post.objects.order_by('-comment_count', '-pk').first()
+        feeds = [
+            ('index', reverse('posts:index'), Post.objects.all()),
+            ('profile',
+             reverse('posts:profile', kwargs={'username': author.username}),
+             Post.objects.filter(author=author)),
+            ('follow_index', reverse('posts:follow_index'),
+             timeline.follow_feed(reader)),
+        ]
+        if group is not None:
+            feeds.append((
+                'group_posts',
+                reverse('posts:group_list', kwargs={'slug': group.slug}),
+                Post.objects.filter(group=group),
+            ))
+        api_urls = {
+            'index': reverse('api:posts'),
+            'profile': reverse(
+                'api:author_posts', kwargs={'username': author.username}),
+            'follow_index': reverse('api:follow_posts'),
+        }
+        if group is not None:
+            api_urls['group_posts'] = reverse(
+                'api:group_posts', kwargs={'slug': group.slug})
+        for name, url, queryset in feeds:
+            yield f'{name}:shallow', url, {}
+            yield f'{name}:deep', url, self.page_params(
+                queryset, POSTS_LIMIT, self.deep_page,
+                POSTS_CURSOR_PAGINATION)
+            # Та же страница ленты в JSON API
+            yield f'api_{name}:shallow', api_urls[name], {}
+            yield f'api_{name}:deep', api_urls[name], self.page_params(
+                queryset, POSTS_LIMIT, self.deep_page, True)
+        if post is not None:
+            url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+            comments = Comment.objects.filter(post=post)
+            yield 'post_detail:shallow', url, {}
+            yield 'post_detail:deep', url, self.page_params(
+                comments, COMMENTS_LIMIT, self.deep_page, True)
+            url = reverse('api:comments', kwargs={'post_id': post.pk})
+            yield 'api_comments:shallow', url, {}
+            yield 'api_comments:deep', url, self.page_params(
+                comments, COMMENTS_LIMIT, self.deep_page, True)
+
+    def measure(self, client, url, params, requests, warm):
+        timings = []
+        queries = []
+        status = None
+        for _ in range(requests):
+            if not warm:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                start = perf_counter()
+                response = client.get(url, params)
+                if response.streaming:
+                    # Потоковый ответ читается целиком, как его прочтет
+                    # клиент
+                    response.getvalue()
+                timings.append((perf_counter() - start) * 1000)
+            queries.append(len(captured))
+            status = response.status_code
+        return {
+            'url': url,
+            'params': params,
+            'status': status,
+            'p50_ms': round(median(timings), 2),
+            'p99_ms': round(percentile(timings, 0.99), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': max(queries),
+        }
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import sitemaps
+from yatube.settings import (SITEMAP_BASE_URL, SITEMAP_CHUNK_SIZE,
+                             SITEMAP_ROOT, SITEMAP_URL)
+
+
+class Command(BaseCommand):
+    help = ('Обновляет карту сайта: индекс и файлы частей для постов, '
+            'групп и профилей. Переписываются только изменившиеся части.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--root', default=SITEMAP_ROOT,
+            help='Каталог карты сайта; по умолчанию SITEMAP_ROOT.',
+        )
+        parser.add_argument(
+            '--base-url', default=SITEMAP_BASE_URL,
+            help='Адрес сайта для ссылок, например https://yatube.ru.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=SITEMAP_CHUNK_SIZE,
+            help='Ширина диапазона pk одной части, не больше 50 000.',
+        )
+
+    def handle(self, *args, root, base_url, chunk_size, **options):
+        if not 0 < chunk_size <= SITEMAP_CHUNK_SIZE:
+            raise CommandError(
+                f'--chunk-size должен быть от 1 до {SITEMAP_CHUNK_SIZE}.')
+        stats = sitemaps.build(root, base_url, chunk_size)
+        self.stdout.write(
+            f"Частей записано: {stats['written']}, "
+            f"без изменений: {stats['kept']}, "
+            f"удалено: {stats['removed']}."
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Карта сайта: {base_url.rstrip("/")}{SITEMAP_URL}'
+            f'{sitemaps.INDEX}'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts.transfer import BATCH_SIZE, export_content
+
+
+class Command(BaseCommand):
+    help = ('Выгружает группы, посты, комментарии и подписки в JSON Lines; '
+            'файл с расширением .gz сжимается.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки.')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько объектов читать и записывать за раз.',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить оборванную выгрузку с последней пачки.',
+        )
+
+    def handle(self, *args, path, batch_size, resume, **options):
+        totals = export_content(path, batch_size=batch_size, resume=resume)
+        for label, total in totals.items():
+            self.stdout.write(f'{label}: {total}')
+        self.stdout.write(self.style.SUCCESS(f'Выгрузка записана в {path}.'))
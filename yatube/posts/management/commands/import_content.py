@@ -0,0 +1,31 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from posts.transfer import BATCH_SIZE, import_content
+
+
+class Command(BaseCommand):
+    help = ('Загружает выгрузку export_content. Пользователи должны уже '
+            'быть в базе; существующие объекты пропускаются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки.')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько объектов сохранять одним bulk_create.',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить оборванную загрузку с последней пачки.',
+        )
+
+    def handle(self, *args, path, batch_size, resume, **options):
+        totals = import_content(path, batch_size=batch_size, resume=resume)
+        for label, total in totals.items():
+            self.stdout.write(f'{label}: {total}')
+        # bulk_create не вызывает сигналы: счетчики, ленты и поисковый
+        # индекс пересчитываются
+        call_command('rebuild_stats', stdout=self.stdout)
+        call_command('rebuild_timeline', stdout=self.stdout)
+        call_command('rebuild_search', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Загружено из {path}.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс постов и комментариев.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            totals = search.rebuild()
+        for label, total in totals.items():
+            self.stdout.write(f'{label}: {total}')
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс пересобран.'))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Comment, Follow, Post, User, UserStats
+
+
+def counts_by(queryset, field):
+    return dict(
+        queryset.order_by().values_list(field).annotate(total=Count('pk')))
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики пользователей и комментариев постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество строк в одном INSERT.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        comments = Comment.objects.filter(post=OuterRef('pk')).order_by()
+        comments = comments.values('post').annotate(total=Count('pk'))
+        with transaction.atomic():
+            Post.objects.update(comment_count=Coalesce(
+                Subquery(comments.values('total')), 0))
+            self.stdout.write('Счетчики комментариев постов пересчитаны.')
+
+            posts = counts_by(Post.objects, 'author')
+            followers = counts_by(Follow.objects, 'author')
+            following = counts_by(Follow.objects, 'user')
+            user_comments = counts_by(Comment.objects, 'author')
+            UserStats.objects.all().delete()
+            batch = []
+            total = 0
+            user_ids = User.objects.order_by('pk').values_list(
+                'pk', flat=True)
+            for user_id in user_ids.iterator(chunk_size=batch_size):
+                batch.append(UserStats(
+                    user_id=user_id,
+                    post_count=posts.get(user_id, 0),
+                    follower_count=followers.get(user_id, 0),
+                    following_count=following.get(user_id, 0),
+                    comment_count=user_comments.get(user_id, 0),
+                ))
+                if len(batch) >= batch_size:
+                    UserStats.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            UserStats.objects.bulk_create(batch)
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитана статистика {total} пользователей.'))
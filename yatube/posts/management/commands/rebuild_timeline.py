@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+from yatube.settings import TIMELINE_BACKFILL
+
+
+class Command(BaseCommand):
+    help = 'Заново раскладывает посты по лентам подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill', type=int, default=TIMELINE_BACKFILL,
+            help='Сколько последних постов автора класть в каждую ленту.',
+        )
+
+    def handle(self, *args, backfill, **options):
+        with transaction.atomic():
+            total = timeline.rebuild(limit=backfill)
+        self.stdout.write(self.style.SUCCESS(
+            f'Ленты пересобраны: {total} записей.'))
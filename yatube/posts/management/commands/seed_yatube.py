@@ -0,0 +1,57 @@
+import os
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from posts.seed import BATCH_SIZE, seed_dataset
+from yatube.settings import TIMELINE_BACKFILL
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу сгенерированными пользователями, группами, '
+            'постами, подписками и комментариями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=500_000)
+        parser.add_argument('--follows', type=int, default=500_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Один и тот же seed дает один и тот же набор данных.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Сколько процессов генерируют строки.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество строк в одном INSERT.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней распределить посты.',
+        )
+        parser.add_argument(
+            '--timeline-backfill', type=int, default=TIMELINE_BACKFILL,
+            help='Сколько последних постов автора класть в каждую ленту.',
+        )
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        seed_dataset(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            follows=options['follows'],
+            comments=options['comments'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            days=options['days'],
+            timeline_backfill=options['timeline_backfill'],
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'База заполнена за {perf_counter() - start:.1f} с.'))
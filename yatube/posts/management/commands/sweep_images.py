@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from yatube.settings import IMAGE_RELEASE_GRACE
+
+
+class Command(BaseCommand):
+    help = ('Удаляет картинки постов, на которые давно нет ссылок. '
+            'Запускается по расписанию.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=IMAGE_RELEASE_GRACE,
+            help='Сколько секунд картинка без ссылок ждет удаления.',
+        )
+
+    def handle(self, *args, grace, **options):
+        deleted = thumbnails.sweep(grace)
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено картинок: {deleted}.'))
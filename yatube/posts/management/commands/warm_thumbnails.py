@@ -0,0 +1,58 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def generate_chunk(names):
+    try:
+        return sum(thumbnails.generate(name) for name in names)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ('Создает недостающие миниатюры картинок постов '
+            'в нескольких процессах.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Сколько процессов создают миниатюры.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=100,
+            help='Сколько картинок передавать процессу за раз.',
+        )
+
+    def chunks(self, chunk_size):
+        names = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True).distinct()
+        chunk = []
+        for name in names.iterator(chunk_size=chunk_size):
+            chunk.append(name)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def handle(self, *args, workers, chunk_size, **options):
+        if workers > 1:
+            # Имена читаются заранее, а подключение закрывается до запуска
+            # процессов, чтобы они не делили его с родителем.
+            chunks = list(self.chunks(chunk_size))
+            connections.close_all()
+            with ProcessPoolExecutor(workers) as executor:
+                total = sum(executor.map(generate_chunk, chunks))
+        else:
+            total = sum(
+                sum(map(thumbnails.generate, chunk))
+                for chunk in self.chunks(chunk_size)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово миниатюр: {total}.'))
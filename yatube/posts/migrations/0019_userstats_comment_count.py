@@ -0,0 +1,74 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:55
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def counts_by(queryset, field):
+    return dict(
+        queryset.order_by().values_list(field).annotate(total=Count('pk')))
+
+
+def fill_counters(apps, schema_editor):
+    """Считает счетчики существующих данных, как rebuild_stats."""
+    alias = schema_editor.connection.alias
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    UserStats = apps.get_model('posts', 'UserStats')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    comments = Comment.objects.using(alias).filter(
+        post=OuterRef('pk')).order_by()
+    comments = comments.values('post').annotate(total=Count('pk'))
+    Post.objects.using(alias).update(comment_count=Coalesce(
+        Subquery(comments.values('total')), 0))
+    posts = counts_by(Post.objects.using(alias), 'author')
+    followers = counts_by(Follow.objects.using(alias), 'author')
+    following = counts_by(Follow.objects.using(alias), 'user')
+    user_comments = counts_by(Comment.objects.using(alias), 'author')
+    user_ids = User.objects.using(alias).order_by('pk').values_list(
+        'pk', flat=True)
+    UserStats.objects.using(alias).bulk_create((
+        UserStats(
+            user_id=user_id,
+            post_count=posts.get(user_id, 0),
+            follower_count=followers.get(user_id, 0),
+            following_count=following.get(user_id, 0),
+            comment_count=user_comments.get(user_id, 0),
+        )
+        for user_id in user_ids.iterator()
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0018_auto_20220416_0354'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('follower_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+            ],
+            options={
+                'verbose_name': 'Статистика пользователя',
+                'verbose_name_plural': 'Статистика пользователей',
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
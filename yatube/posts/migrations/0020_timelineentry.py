@@ -0,0 +1,72 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from yatube.settings import TIMELINE_BACKFILL, TIMELINE_FANOUT_LIMIT
+
+# Тот же запрос, что в timeline.rebuild
+REBUILD_SQL = """
+    INSERT INTO {entry} (user_id, post_id, author_id, created)
+    SELECT follow.user_id, post.id, post.author_id, post.created
+    FROM {follow} follow
+    JOIN (
+        SELECT id, author_id, created, ROW_NUMBER() OVER (
+            PARTITION BY author_id ORDER BY created DESC, id DESC
+        ) AS position
+        FROM {post}
+    ) post ON post.author_id = follow.author_id AND post.position <= %s
+    WHERE follow.author_id NOT IN (
+        SELECT user_id FROM {stats} WHERE follower_count > %s
+    )
+"""
+
+
+def fill_timelines(apps, schema_editor):
+    """Раскладывает существующие посты по лентам подписчиков."""
+    tables = {
+        key: apps.get_model('posts', model)._meta.db_table
+        for key, model in (('entry', 'TimelineEntry'), ('follow', 'Follow'),
+                            ('post', 'Post'), ('stats', 'UserStats'))
+    }
+    schema_editor.execute(
+        REBUILD_SQL.format(**tables),
+        [TIMELINE_BACKFILL, TIMELINE_FANOUT_LIMIT])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0019_userstats_comment_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(verbose_name='Дата создания поста')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор поста')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.Post', verbose_name='Пост')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Читатель')),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-created'], name='timeline_user_created'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', 'author'], name='timeline_user_author'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_post'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# Таблицы FTS5 для posts.search.SQLiteBackend; в других базах
+# индекс не создается.
+TABLES = ('posts_post', 'posts_comment')
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table in TABLES:
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {table}_search USING fts5('
+            f"text, tokenize = 'unicode61 remove_diacritics 2')")
+        schema_editor.execute(
+            f'INSERT INTO {table}_search(rowid, text) '
+            f'SELECT id, text FROM {table}')
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table in TABLES:
+        schema_editor.execute(f'DROP TABLE IF EXISTS {table}_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0027_timeline_feed_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReleasedImage',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Имя файла')),
+                ('released', models.DateTimeField(db_index=True, verbose_name='Освобожден')),
+            ],
+            options={
+                'verbose_name': 'Освобожденная картинка',
+                'verbose_name_plural': 'Освобожденные картинки',
+            },
+        ),
+    ]
@@ -1,5 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .storage import ContentAddressedStorage
 
 User = get_user_model()
 
@@ -15,7 +19,34 @@ class CreatedModel(models.Model):
         abstract = True
 
 
-class Post(CreatedModel):
+class ModifiedModel(CreatedModel):
+    """Абстрактная модель. Добавляет даты создания и изменения."""
+    modified = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
+
+    class Meta:
+        abstract = True
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты со всеми полями, которые нужны шаблонам лент.
+
+        Автор и группа подгружаются тем же запросом, остальные
+        колонки не выбираются.
+        """
+        return self.select_related('author', 'group').only(
+            'id', 'created', 'modified', 'text', 'image',
+            'thumbnail_url', 'thumbnail_width', 'thumbnail_height',
+            'author', 'author__username',
+            'author__first_name', 'author__last_name',
+            'group', 'group__slug', 'group__title',
+        )
+
+
+class Post(ModifiedModel):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Текст поста',
@@ -36,11 +67,49 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, editable=False)
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, editable=False)
+    image_size = models.PositiveIntegerField(
+        'Размер картинки, байт', null=True, editable=False)
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+    # Миниатюра картинки для лент, заполняется при ее создании
+    thumbnail_url = models.CharField(
+        'Адрес миниатюры', max_length=255, blank=True, editable=False)
+    thumbnail_width = models.PositiveIntegerField(
+        'Ширина миниатюры', null=True, editable=False)
+    thumbnail_height = models.PositiveIntegerField(
+        'Высота миниатюры', null=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created']
+        # id в конце индексов нужен для сортировки (created, id)
+        # курсорной пагинации без временного B-дерева.
+        indexes = [
+            models.Index(fields=['-created', '-id'],
+                         name='post_created_idx'),
+            models.Index(fields=['author', '-created', '-id'],
+                         name='post_author_created_idx'),
+            models.Index(fields=['group', '-created', '-id'],
+                         name='post_group_created_idx'),
+            # Число постов с картинкой — счетчик ссылок на файл.
+            models.Index(fields=['image'], name='post_image_idx'),
+            # Last-Modified профиля и группы — MAX(modified) по индексу
+            models.Index(fields=['author', 'modified'],
+                         name='post_author_modified_idx'),
+            models.Index(fields=['group', 'modified'],
+                         name='post_group_modified_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -57,7 +126,7 @@ class Group(CreatedModel):
         return self.title
 
 
-class Comment(CreatedModel):
+class Comment(ModifiedModel):
     post = models.ForeignKey(
         Post,
         related_name='comments',
@@ -75,6 +144,12 @@ class Comment(CreatedModel):
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='comment_post_created_idx'),
+            models.Index(fields=['post', 'modified'],
+                         name='comment_post_modified_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.text
@@ -99,7 +174,121 @@ class Follow(CreatedModel):
 
     class Meta:
         db_table = 'subsription'
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
         constraints = [
             models.UniqueConstraint(fields=['user', 'author'],
                                     name='unique_following')
         ]
+
+
+class UserStatsManager(models.Manager):
+    def for_user(self, user_id):
+        """Счетчики пользователя; отсутствующая строка считается с нуля."""
+        try:
+            return self.get(pk=user_id)
+        except self.model.DoesNotExist:
+            stats, _ = self.get_or_create(
+                user_id=user_id, defaults=self.model.count_for(user_id))
+            return stats
+
+    def change(self, user_id, **deltas):
+        """Атомарно изменяет счетчики: change(pk, post_count=1)."""
+        updates = {
+            field: Greatest(F(field) + delta, 0)
+            for field, delta in deltas.items()
+        }
+        updated = self.filter(pk=user_id).update(**updates)
+        if not updated and min(deltas.values()) > 0:
+            # Строки еще нет: она создается уже с учетом изменения.
+            # При уменьшении (удалении, в том числе каскадном вместе
+            # с пользователем) строка не создается: ее посчитает for_user.
+            self.for_user(user_id)
+
+
+class UserStats(models.Model):
+    """Денормализованные счетчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    post_count = models.PositiveIntegerField('Постов', default=0)
+    follower_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    comment_count = models.PositiveIntegerField('Комментариев', default=0)
+
+    objects = UserStatsManager()
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self) -> str:
+        return f'Статистика {self.user_id}'
+
+    @staticmethod
+    def count_for(user_id):
+        return {
+            'post_count': Post.objects.filter(author_id=user_id).count(),
+            'follower_count': Follow.objects.filter(
+                author_id=user_id).count(),
+            'following_count': Follow.objects.filter(
+                user_id=user_id).count(),
+            'comment_count': Comment.objects.filter(
+                author_id=user_id).count(),
+        }
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок пользователя, разложенный при публикации."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор поста',
+    )
+    created = models.DateTimeField('Дата создания поста')
+
+    class Meta:
+        ordering = ['-created']
+        indexes = [
+            models.Index(fields=['user', '-created', '-post'],
+                         name='timeline_user_feed'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_post')
+        ]
+
+
+class ReleasedImage(models.Model):
+    """Файл картинки, на который перестали ссылаться посты.
+
+    Файл удаляется не сразу, а командой sweep_images по прошествии
+    IMAGE_RELEASE_GRACE секунд (thumbnails.sweep).
+    """
+    name = models.CharField('Имя файла', max_length=100, primary_key=True)
+    released = models.DateTimeField('Освобожден', db_index=True)
+
+    class Meta:
+        verbose_name = 'Освобожденная картинка'
+        verbose_name_plural = 'Освобожденные картинки'
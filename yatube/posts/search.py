@@ -0,0 +1,177 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Тексты постов и комментариев копируются в инвертированный индекс,
+который поддерживают сигналы post_save и post_delete. bulk_create
+сигналы не вызывает, поэтому после массовой загрузки индекс
+пересобирается командой rebuild_search.
+
+Индекс хранит бэкенд из настройки SEARCH_BACKEND. SQLiteBackend
+использует виртуальные таблицы FTS5 (их создает миграция) и сортирует
+результаты по BM25. DatabaseBackend подходит для любой базы: он ищет
+через icontains без индекса и сортирует по новизне.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from yatube.settings import (SEARCH_BACKEND, SEARCH_COMMENT_WEIGHT,
+                             SEARCH_MAX_RESULTS, SEARCH_MAX_TERMS)
+from .models import Comment, Post
+
+# Модели, тексты которых попадают в индекс
+MODELS = (Post, Comment)
+WORD = re.compile(r'\w+')
+
+_backend = None
+
+
+def terms(query):
+    """Слова запроса в нижнем регистре, не больше SEARCH_MAX_TERMS."""
+    return WORD.findall(query.lower())[:SEARCH_MAX_TERMS]
+
+
+class DatabaseBackend:
+    """Поиск без индекса: все слова запроса через icontains."""
+
+    def index(self, obj):
+        pass
+
+    def remove(self, obj):
+        pass
+
+    def rebuild(self, model):
+        return 0
+
+    def _matches(self, words):
+        condition = Q()
+        for word in words:
+            condition &= Q(text__icontains=word)
+        return condition
+
+    def search(self, model, words, limit):
+        return list(model.objects.filter(self._matches(words)).order_by(
+            '-pk').values_list('pk', flat=True)[:limit])
+
+    def search_posts(self, words, limit):
+        condition = self._matches(words)
+        commented = Comment.objects.filter(condition).values('post_id')
+        return list(Post.objects.filter(
+            condition | Q(pk__in=commented)
+        ).order_by('-created', '-pk').values_list('pk', flat=True)[:limit])
+
+
+class SQLiteBackend(DatabaseBackend):
+    """Индекс в таблицах FTS5 <таблица модели>_search, rowid = pk."""
+
+    SEARCH_POSTS_SQL = '''
+        SELECT post_id FROM (
+            SELECT * FROM (
+                SELECT rowid AS post_id, rank FROM {post_index}
+                WHERE {post_index} MATCH %s ORDER BY rank LIMIT %s
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT comment.post_id, {comment_index}.rank * %s
+                FROM {comment_index}
+                JOIN {comment} AS comment
+                    ON comment.id = {comment_index}.rowid
+                WHERE {comment_index} MATCH %s ORDER BY rank LIMIT %s
+            )
+        )
+        GROUP BY post_id
+        ORDER BY MIN(rank), post_id DESC
+        LIMIT %s
+    '''
+
+    def table(self, model):
+        return f'{model._meta.db_table}_search'
+
+    def execute(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            if cursor.description is None:
+                return cursor.rowcount
+            return [row[0] for row in cursor.fetchall()]
+
+    def match(self, words):
+        """Выражение MATCH: все слова запроса, каждое как префикс."""
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def index(self, obj):
+        self.execute(
+            f'INSERT OR REPLACE INTO {self.table(type(obj))}(rowid, text) '
+            f'VALUES (%s, %s)', [obj.pk, obj.text])
+
+    def remove(self, obj):
+        self.execute(
+            f'DELETE FROM {self.table(type(obj))} WHERE rowid = %s',
+            [obj.pk])
+
+    def rebuild(self, model):
+        table = self.table(model)
+        self.execute(f'DELETE FROM {table}')
+        return self.execute(
+            f'INSERT INTO {table}(rowid, text) '
+            f'SELECT id, text FROM {model._meta.db_table}')
+
+    def search(self, model, words, limit):
+        table = self.table(model)
+        return self.execute(
+            f'SELECT rowid FROM {table} WHERE {table} MATCH %s '
+            f'ORDER BY rank LIMIT %s', [self.match(words), limit])
+
+    def search_posts(self, words, limit):
+        """Посты по BM25; совпадение в комментарии весит меньше."""
+        sql = self.SEARCH_POSTS_SQL.format(
+            post_index=self.table(Post),
+            comment_index=self.table(Comment),
+            comment=Comment._meta.db_table,
+        )
+        match = self.match(words)
+        return self.execute(sql, [
+            match, limit, SEARCH_COMMENT_WEIGHT, match, limit, limit])
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(SEARCH_BACKEND)()
+    return _backend
+
+
+def index(obj):
+    """Добавляет или обновляет текст поста или комментария в индексе."""
+    get_backend().index(obj)
+
+
+def remove(obj):
+    get_backend().remove(obj)
+
+
+def rebuild():
+    """Пересобирает индекс; возвращает число строк по меткам моделей."""
+    return {
+        model._meta.label_lower: get_backend().rebuild(model)
+        for model in MODELS
+    }
+
+
+def search(model, query, limit=SEARCH_MAX_RESULTS):
+    """pk постов или комментариев со всеми словами запроса."""
+    words = terms(query)
+    if not words:
+        return []
+    return get_backend().search(model, words, limit)
+
+
+def search_posts(query, limit=SEARCH_MAX_RESULTS):
+    """pk постов, найденных по их тексту и тексту комментариев.
+
+    Лучшие совпадения идут первыми.
+    """
+    words = terms(query)
+    if not words:
+        return []
+    return get_backend().search_posts(words, limit)
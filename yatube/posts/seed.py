@@ -0,0 +1,266 @@
+"""Заполнение базы синтетическими данными для замеров производительности.
+
+Строки генерируются кусками: каждый кусок получает свой генератор
+случайных чисел от (seed, вид строк, номер куска), поэтому данные
+одинаковы при любом числе процессов. Куски можно генерировать
+в нескольких процессах, а вставляются они в основном процессе пачками
+через bulk_create. Сигналы при этом не срабатывают: счетчики, ленты
+подписок и поисковый индекс после заполнения пересчитываются командами
+rebuild_stats, rebuild_timeline и rebuild_search.
+
+Авторы постов, подписки и комментарии распределены по степенному закону:
+немногие пользователи пишут большую часть постов и собирают большую
+часть подписчиков, а свежие посты получают больше комментариев.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+from multiprocessing import Pool
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from yatube.settings import TIMELINE_BACKFILL
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 5000
+FAKER_LOCALE = 'ru_RU'
+# Чем больше показатель, тем сильнее посты, подписчики и комментарии
+# сосредоточены у немногих пользователей и постов; не равен 1
+POWER_LAW_EXPONENT = 1.2
+# Доля постов без группы
+NO_GROUP_SHARE = 0.2
+GROUP_SLUG = 'seed-{}'
+
+
+def power_law_index(rnd, size, exponent=POWER_LAW_EXPONENT):
+    """Случайный индекс от 0 до size - 1, малые индексы выпадают чаще."""
+    power = 1 - exponent
+    value = ((size ** power - 1) * rnd.random() + 1) ** (1 / power)
+    return min(int(value) - 1, size - 1)
+
+
+def _post_time(spec, index):
+    """Время поста index в секундах от начала периода, не раньше него."""
+    return spec['span'] * (index + 1) / spec['posts']
+
+
+def _users(rnd, fake, spec, start, stop):
+    return [
+        (
+            f"{fake.user_name()}_{spec['first_user'] + index}",
+            fake.first_name(),
+            fake.last_name(),
+        )
+        for index in range(start, stop)
+    ]
+
+
+def _posts(rnd, fake, spec, start, stop):
+    rows = []
+    for index in range(start, stop):
+        group = None
+        if spec['groups'] and rnd.random() >= NO_GROUP_SHARE:
+            group = power_law_index(rnd, spec['groups'])
+        rows.append((
+            power_law_index(rnd, spec['users']),
+            group,
+            fake.text(max_nb_chars=300),
+            spec['span'] * (index + rnd.random()) / spec['posts'],
+        ))
+    return rows
+
+
+def _follows(rnd, fake, spec, start, stop):
+    """Подписки пользователей start..stop без повторов и на себя."""
+    users = spec['users']
+    per_user = spec['follows'] / users
+    rows = []
+    for user in range(start, stop):
+        count = min(round(rnd.expovariate(1 / per_user)), users - 1)
+        authors = set()
+        for _ in range(count * 3):
+            if len(authors) >= count:
+                break
+            author = power_law_index(rnd, users)
+            if author != user:
+                authors.add(author)
+        rows.extend((user, author) for author in sorted(authors))
+    return rows
+
+
+def _comments(rnd, fake, spec, start, stop):
+    rows = []
+    for _ in range(start, stop):
+        post = spec['posts'] - 1 - power_law_index(rnd, spec['posts'])
+        posted = _post_time(spec, post)
+        rows.append((
+            post,
+            rnd.randrange(spec['users']),
+            fake.sentence(nb_words=12),
+            posted + rnd.random() * (spec['span'] - posted),
+        ))
+    return rows
+
+
+GENERATORS = {
+    'users': _users,
+    'posts': _posts,
+    'follows': _follows,
+    'comments': _comments,
+}
+
+
+def generate(task):
+    """Строки одного куска; выполняется в процессе из пула."""
+    kind, chunk, start, stop, spec = task
+    rnd = random.Random(f"{spec['seed']}:{kind}:{chunk}")
+    fake = Faker(FAKER_LOCALE)
+    fake.seed_instance(rnd.random())
+    return GENERATORS[kind](rnd, fake, spec, start, stop)
+
+
+def _tasks(kind, total, chunk_size, spec):
+    for chunk, start in enumerate(range(0, total, chunk_size)):
+        yield kind, chunk, start, min(start + chunk_size, total), spec
+
+
+@contextmanager
+def explicit_created(*models):
+    """Позволяет задать created и modified вручную.
+
+    Отключает auto_now_add у created и auto_now у modified.
+    """
+    fields = []
+    for model in models:
+        for field in model._meta.get_fields():
+            for option in ('auto_now_add', 'auto_now'):
+                if getattr(field, option, False):
+                    fields.append((field, option))
+    for field, option in fields:
+        setattr(field, option, False)
+    try:
+        yield
+    finally:
+        for field, option in fields:
+            setattr(field, option, True)
+
+
+def _last_pk(model):
+    return model.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+def _insert(model, objs, batch_size):
+    """Вставляет объекты из генератора пачками по batch_size.
+
+    Возвращает диапазон первичных ключей новых строк: они идут подряд
+    после всех выданных ранее, поэтому диапазон отсчитывается от
+    последнего ключа после вставки.
+    """
+    batch = []
+    total = 0
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    model.objects.bulk_create(batch)
+    total += len(batch)
+    last = _last_pk(model)
+    return range(last - total + 1, last + 1)
+
+
+def seed_dataset(users, groups, posts, follows, comments, seed=0,
+                 batch_size=BATCH_SIZE, workers=1, days=365,
+                 timeline_backfill=TIMELINE_BACKFILL, stdout=None):
+    """Создает пользователей, группы, посты, подписки и комментарии.
+
+    Одинаковый seed дает одинаковый набор данных при любом workers.
+    Посты и комментарии распределены по последним days дням.
+    """
+    stdout = stdout or StringIO()
+    spec = {
+        'seed': seed,
+        'first_user': _last_pk(User) + 1,
+        'users': users,
+        'groups': groups,
+        'posts': posts if users else 0,
+        'follows': follows if users > 1 else 0,
+        'span': timedelta(days=days).total_seconds(),
+    }
+    spec['comments'] = comments if spec['posts'] else 0
+    since = timezone.now() - timedelta(days=days)
+    pool = Pool(workers) if workers > 1 else None
+    imap = pool.imap if pool else map
+
+    # Подписки генерируются по подписчикам, остальное — построчно
+    totals = dict(spec, follows=users if spec['follows'] else 0)
+
+    def rows(kind):
+        return (
+            row
+            for chunk in imap(generate, _tasks(
+                kind, totals[kind], batch_size, spec))
+            for row in chunk
+        )
+
+    try:
+        with transaction.atomic(), explicit_created(Post, Comment):
+            user_pks = _insert(User, (
+                User(username=username, first_name=first_name,
+                     last_name=last_name, password='!')
+                for username, first_name, last_name in rows('users')
+            ), batch_size)
+            stdout.write(f'Пользователей: {len(user_pks)}')
+            first_group = _last_pk(Group) + 1
+            group_pks = _insert(Group, (
+                Group(
+                    title=f'Группа {first_group + index}',
+                    slug=GROUP_SLUG.format(first_group + index),
+                    description='Группа со сгенерированными постами',
+                )
+                for index in range(groups)
+            ), batch_size)
+            stdout.write(f'Групп: {len(group_pks)}')
+            post_pks = _insert(Post, (
+                Post(
+                    author_id=user_pks[author],
+                    group_id=None if group is None else group_pks[group],
+                    text=text,
+                    created=since + timedelta(seconds=created),
+                    modified=since + timedelta(seconds=created),
+                )
+                for author, group, text, created in rows('posts')
+            ), batch_size)
+            stdout.write(f'Постов: {len(post_pks)}')
+            follow_pks = _insert(Follow, (
+                Follow(user_id=user_pks[user], author_id=user_pks[author])
+                for user, author in rows('follows')
+            ), batch_size)
+            stdout.write(f'Подписок: {len(follow_pks)}')
+            comment_pks = _insert(Comment, (
+                Comment(
+                    post_id=post_pks[post],
+                    author_id=user_pks[author],
+                    text=text,
+                    created=since + timedelta(seconds=created),
+                    modified=since + timedelta(seconds=created),
+                )
+                for post, author, text, created in rows('comments')
+            ), batch_size)
+            stdout.write(f'Комментариев: {len(comment_pks)}')
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    call_command('rebuild_stats', batch_size=batch_size, stdout=stdout)
+    call_command(
+        'rebuild_timeline', backfill=timeline_backfill, stdout=stdout)
+    call_command('rebuild_search', stdout=stdout)
+    cache.clear()
@@ -0,0 +1,191 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, counters, search, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    """Запоминает прежние группу и автора поста перед изменением.
+
+    Если сменилась картинка, сохраненная миниатюра сбрасывается,
+    а прежняя картинка запоминается, чтобы освободить ее файл.
+    """
+    instance._old_group_id = None
+    instance._old_author_id = None
+    instance._old_image = None
+    if instance.pk is None:
+        return
+    old = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', 'author_id', 'image').first()
+    if old is not None:
+        instance._old_group_id, instance._old_author_id, old_image = old
+        if old_image != instance.image.name:
+            instance._old_image = old_image
+            instance.thumbnail_url = ''
+            instance.thumbnail_width = instance.thumbnail_height = None
+
+
+def forget_post(post, old_group_id=None):
+    """Сбрасывает кэш поста и страниц, на которых он показан."""
+    caching.bump_feed()
+    caching.forget_post(post.pk)
+    keys = [
+        caching.POST_VERSION_KEY.format(post.pk),
+        caching.AUTHOR_VERSION_KEY.format(post.author_id),
+    ]
+    for group_id in {post.group_id, old_group_id} - {None}:
+        keys.append(caching.GROUP_VERSION_KEY.format(group_id))
+    caching.bump(*keys)
+
+
+def release_image_on_commit(name):
+    if name:
+        transaction.on_commit(lambda: thumbnails.release(name))
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    forget_post(instance, instance._old_group_id)
+    if raw:
+        return
+    if instance.image:
+        thumbnails.schedule(instance.image.name)
+    release_image_on_commit(instance._old_image)
+    if created:
+        counters.post_added(instance)
+        UserStats.objects.change(instance.author_id, post_count=1)
+        timeline.fan_out(instance)
+        return
+    if instance._old_group_id != instance.group_id:
+        counters.post_regrouped(instance._old_group_id, instance.group_id)
+    if instance._old_author_id not in (None, instance.author_id):
+        UserStats.objects.change(instance._old_author_id, post_count=-1)
+        UserStats.objects.change(instance.author_id, post_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    forget_post(instance)
+    counters.post_removed(instance)
+    UserStats.objects.change(instance.author_id, post_count=-1)
+    timeline.post_removed(instance)
+    release_image_on_commit(instance.image.name)
+
+
+def comment_counted(comment, delta):
+    """Меняет счетчики комментариев поста и автора комментария."""
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=Greatest(F('comment_count') + delta, 0))
+    UserStats.objects.change(comment.author_id, comment_count=delta)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        comment_counted(instance, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    comment_counted(instance, -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    caching.forget_post(instance.post_id)
+    caching.bump(
+        caching.POST_VERSION_KEY.format(instance.post_id),
+        caching.AUTHOR_VERSION_KEY.format(instance.author_id),
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def text_saved(sender, instance, **kwargs):
+    search.index(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def text_deleted(sender, instance, **kwargs):
+    search.remove(instance)
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_slug(sender, instance, **kwargs):
+    """Запоминает прежний slug группы перед изменением."""
+    instance._old_slug = None
+    if instance.pk is not None:
+        instance._old_slug = Group.objects.filter(
+            pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    caching.bump_feed()
+    for slug in {instance.slug, getattr(instance, '_old_slug', None)}:
+        if slug is not None:
+            caching.forget_group(slug, instance.pk)
+    caching.bump(caching.GROUP_VERSION_KEY.format(instance.pk))
+
+
+# Вход пользователя сохраняет только last_login, на страницах его нет
+LOGIN_FIELDS = frozenset({'last_login'})
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, update_fields=None, **kwargs):
+    """Запоминает прежний username пользователя перед изменением."""
+    instance._old_username = None
+    if instance.pk is not None and update_fields != LOGIN_FIELDS:
+        instance._old_username = User.objects.filter(
+            pk=instance.pk).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, created=False, update_fields=None,
+                 **kwargs):
+    if update_fields == LOGIN_FIELDS:
+        return
+    for username in {instance.username,
+                     getattr(instance, '_old_username', None)}:
+        if username is not None:
+            caching.forget_author(username)
+    if not created:
+        caching.forget_author_posts(instance.pk)
+    caching.bump(caching.AUTHOR_VERSION_KEY.format(instance.pk))
+
+
+def follow_changed(instance, delta=0):
+    """Подписка меняет счетчики в профилях обоих пользователей."""
+    if delta:
+        UserStats.objects.change(instance.user_id, following_count=delta)
+        UserStats.objects.change(instance.author_id, follower_count=delta)
+    caching.bump(
+        caching.AUTHOR_VERSION_KEY.format(instance.author_id),
+        caching.AUTHOR_VERSION_KEY.format(instance.user_id),
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        follow_changed(instance, 1)
+        timeline.backfill(instance.user_id, instance.author_id)
+    else:
+        follow_changed(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follow_changed(instance, -1)
+    timeline.remove(instance.user_id, instance.author_id)
+    timeline.follower_removed(instance.author_id)
@@ -0,0 +1,225 @@
+"""Карта сайта для поисковых роботов: индекс и файлы по частям.
+
+Команда build_sitemaps пишет в SITEMAP_ROOT файлы
+sitemap-<раздел>-<n>.xml и индекс sitemap.xml, а веб-сервер отдает их
+как статику, поэтому роботам не нужно листать ленты. Часть n раздела
+содержит строки с pk из диапазона [n * size, (n + 1) * size): таблица
+читается диапазонами первичного ключа без OFFSET, а новые строки
+попадают только в последние части.
+
+Сборка инкрементальная: в manifest.json хранятся подписи частей,
+и файл переписывается, только если подпись изменилась. Для постов
+подпись — число строк и наибольший modified диапазона; подписи всех
+частей считает один запрос с GROUP BY, и неизменившиеся части не
+читаются. У групп и пользователей смена slug и username следа
+не оставляет, поэтому их части читаются всегда, а подпись — хэш
+содержимого.
+"""
+import json
+import os
+from hashlib import sha256
+from tempfile import NamedTemporaryFile
+from xml.sax.saxutils import escape
+
+from django.db.models import (Count, Exists, ExpressionWrapper, F,
+                              IntegerField, Max, OuterRef)
+from django.urls import reverse
+from django.utils import timezone
+
+from yatube.settings import (SITEMAP_BASE_URL, SITEMAP_CHUNK_SIZE,
+                             SITEMAP_ROOT, SITEMAP_URL)
+from .models import Group, Post, User
+
+INDEX = 'sitemap.xml'
+MANIFEST = 'manifest.json'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def _lastmod(value):
+    return value.replace(microsecond=0).isoformat()
+
+
+class Section:
+    """Раздел карты: строки модели и адреса их страниц."""
+
+    name = None
+    # Колонки строки: pk и то, из чего строится адрес
+    fields = ()
+
+    def queryset(self):
+        raise NotImplementedError
+
+    def location(self, row):
+        raise NotImplementedError
+
+    def lastmod(self, row):
+        return None
+
+    def rows(self, number, size):
+        """Строки части number по возрастанию pk."""
+        return self.queryset().filter(
+            pk__gte=number * size, pk__lt=(number + 1) * size,
+        ).order_by('pk').values_list(*self.fields).iterator()
+
+    def numbers(self, size):
+        """Номера непустых частей; пустые диапазоны pk пропускаются."""
+        start = 0
+        while True:
+            pk = self.queryset().filter(pk__gte=start).order_by(
+                'pk').values_list('pk', flat=True).first()
+            if pk is None:
+                return
+            number = pk // size
+            yield number
+            start = (number + 1) * size
+
+    def render(self, number, size, base_url):
+        """XML части и наибольший lastmod ее адресов."""
+        urls = []
+        latest = None
+        for row in self.rows(number, size):
+            loc = escape(base_url + self.location(row))
+            lastmod = self.lastmod(row)
+            if lastmod is None:
+                urls.append(f'<url><loc>{loc}</loc></url>')
+                continue
+            latest = lastmod if latest is None else max(latest, lastmod)
+            urls.append(
+                f'<url><loc>{loc}</loc>'
+                f'<lastmod>{_lastmod(lastmod)}</lastmod></url>')
+        content = _document('urlset', urls)
+        return content, latest
+
+    def chunks(self, size, base_url):
+        """(номер, подпись, render) частей; render() дает XML и lastmod."""
+        for number in self.numbers(size):
+            content, latest = self.render(number, size, base_url)
+            signature = sha256(content.encode()).hexdigest()
+            yield number, signature, (
+                lambda content=content, latest=latest: (content, latest))
+
+
+class PostSection(Section):
+    name = 'posts'
+    fields = ('pk', 'modified')
+
+    def queryset(self):
+        return Post.objects.all()
+
+    def location(self, row):
+        return reverse('posts:post_detail', args=[row[0]])
+
+    def lastmod(self, row):
+        return row[1]
+
+    def chunks(self, size, base_url):
+        chunk = ExpressionWrapper(
+            F('pk') / size, output_field=IntegerField())
+        signatures = self.queryset().annotate(chunk=chunk).values(
+            'chunk').annotate(
+            count=Count('pk'), last=Max('modified')).order_by('chunk')
+        for row in signatures:
+            number = row['chunk']
+            signature = f"{row['count']}:{row['last'].isoformat()}"
+            yield number, signature, (
+                lambda number=number: self.render(number, size, base_url))
+
+
+class GroupSection(Section):
+    name = 'groups'
+    fields = ('pk', 'slug')
+
+    def queryset(self):
+        return Group.objects.all()
+
+    def location(self, row):
+        return reverse('posts:group_list', args=[row[1]])
+
+
+class ProfileSection(Section):
+    """Профили активных пользователей, у которых есть посты."""
+
+    name = 'profiles'
+    fields = ('pk', 'username')
+
+    def queryset(self):
+        return User.objects.annotate(has_posts=Exists(
+            Post.objects.filter(author=OuterRef('pk')))).filter(
+            has_posts=True, is_active=True)
+
+    def location(self, row):
+        return reverse('posts:profile', args=[row[1]])
+
+
+SECTIONS = (PostSection(), GroupSection(), ProfileSection())
+
+
+def _document(tag, entries):
+    body = '\n'.join(entries)
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<{tag} xmlns="{XMLNS}">\n{body}\n</{tag}>\n')
+
+
+def _write(root, name, content):
+    """Пишет файл целиком через временный, чтобы не отдать его частично."""
+    with NamedTemporaryFile(
+            'w', encoding='utf-8', dir=root, delete=False) as file:
+        file.write(content)
+    os.chmod(file.name, 0o644)
+    os.replace(file.name, os.path.join(root, name))
+
+
+def _read_manifest(root, base_url, size):
+    """Подписи прошлой сборки, если адрес сайта и размер частей те же."""
+    try:
+        with open(os.path.join(root, MANIFEST), encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if (manifest.get('base_url'), manifest.get('size')) != (base_url, size):
+        return {}
+    return manifest.get('files', {})
+
+
+def build(root=SITEMAP_ROOT, base_url=SITEMAP_BASE_URL,
+          size=SITEMAP_CHUNK_SIZE):
+    """Обновляет карту сайта в root.
+
+    Возвращает число записанных, оставленных и удаленных файлов частей.
+    """
+    base_url = base_url.rstrip('/')
+    os.makedirs(root, exist_ok=True)
+    old = _read_manifest(root, base_url, size)
+    files = {}
+    stats = {'written': 0, 'kept': 0, 'removed': 0}
+    for section in SECTIONS:
+        for number, signature, render in section.chunks(size, base_url):
+            name = f'sitemap-{section.name}-{number}.xml'
+            entry = old.get(name)
+            if (entry is not None and entry['signature'] == signature
+                    and os.path.exists(os.path.join(root, name))):
+                files[name] = entry
+                stats['kept'] += 1
+                continue
+            content, latest = render()
+            _write(root, name, content)
+            files[name] = {
+                'signature': signature,
+                'lastmod': _lastmod(latest or timezone.now()),
+            }
+            stats['written'] += 1
+    sitemaps = [
+        f'<sitemap><loc>{escape(base_url + SITEMAP_URL + name)}</loc>'
+        f"<lastmod>{entry['lastmod']}</lastmod></sitemap>"
+        for name, entry in files.items()
+    ]
+    _write(root, INDEX, _document('sitemapindex', sitemaps))
+    _write(root, MANIFEST, json.dumps(
+        {'base_url': base_url, 'size': size, 'files': files}, indent=2))
+    for name in set(old) - set(files):
+        try:
+            os.remove(os.path.join(root, name))
+        except FileNotFoundError:
+            pass
+        stats['removed'] += 1
+    return stats
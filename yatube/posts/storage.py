@@ -0,0 +1,52 @@
+"""Хранилище картинок постов с адресацией по содержимому.
+
+Файл называется по SHA-256 своего содержимого и лежит в подкаталогах
+из первых символов хеша: posts/ab/cd/abcd...webp. Одинаковые картинки
+поэтому хранятся один раз, и у них общие миниатюры, а каталоги
+не разрастаются до миллионов файлов. Файл удаляется, когда на него
+не ссылается ни один пост (thumbnails.release и thumbnails.sweep).
+
+Повторное сохранение уже существующего файла обновляет его время
+изменения: так sweep видит, что файл снова понадобился, даже если
+пост с ним еще не закоммичен.
+"""
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    # Сколько символов хеша идет на каждый уровень подкаталогов
+    shard_width = 2
+    shard_depth = 2
+
+    def content_name(self, name, content):
+        """Имя файла по хешу содержимого с расширением исходного имени."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        shards = [
+            digest[i * self.shard_width:(i + 1) * self.shard_width]
+            for i in range(self.shard_depth)
+        ]
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            os.path.dirname(name), *shards, digest + extension
+        ).replace('\\', '/')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return self._save(name, content)
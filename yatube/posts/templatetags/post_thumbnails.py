@@ -0,0 +1,11 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.filter
+def with_thumbnails(posts):
+    """Посты страницы с данными миниатюр, полученными одним get_many."""
+    return thumbnails.prefetch(posts)
@@ -0,0 +1,42 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+SIZES = {'users': 20, 'groups': 3, 'posts': 300, 'follows': 60,
+         'comments': 200}
+
+
+class BenchmarkCommandTestCase(TestCase):
+    def run_benchmark(self):
+        out = StringIO()
+        call_command(
+            'benchmark_views', seed=True, requests=2, deep_page=3,
+            stdout=out, stderr=StringIO(), **SIZES,
+        )
+        return json.loads(out.getvalue())
+
+    def test_report(self):
+        """Отчет содержит замеры всех страниц на ближней и дальней глубине."""
+        report = self.run_benchmark()
+        self.assertEqual(report['dataset']['posts'], 300)
+        for view in ('index', 'group_posts', 'profile', 'post_detail',
+                     'follow_index'):
+            for depth in ('shallow', 'deep'):
+                with self.subTest(case=f'{view}:{depth}'):
+                    result = report['results'][f'{view}:{depth}']
+                    self.assertEqual(result['status'], 200)
+                    self.assertGreater(result['queries'], 0)
+                    self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(
+            report['results']['index:deep']['params'], {'page': 3})
+
+    def test_cursor_pagination(self):
+        """При курсорной пагинации дальняя страница задается курсором."""
+        with mock.patch(
+                'posts.management.commands.benchmark_views'
+                '.POSTS_CURSOR_PAGINATION', True):
+            report = self.run_benchmark()
+        self.assertIn('cursor', report['results']['index:deep']['params'])
@@ -0,0 +1,168 @@
+import pickle
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import caching
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='Author')
+        self.reader = User.objects.create_user(username='Reader')
+        self.group = Group.objects.create(title='Группа', slug='cached')
+        self.post = Post.objects.create(
+            author=self.author, text='Первый пост', group=self.group)
+        self.urls = {
+            'group': reverse('posts:group_list', kwargs={'slug': 'cached'}),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': 'Author'}),
+            'post': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}),
+        }
+
+    def test_pages_cached_for_anonymous(self):
+        """Повторный анонимный запрос не обращается к базе."""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.client.get(url)
+                with self.assertNumQueries(0):
+                    cached = self.client.get(url)
+                self.assertEqual(response.content, cached.content)
+
+    def test_not_cached_for_authenticated(self):
+        """Авторизованному пользователю страница собирается заново."""
+        client = Client()
+        client.force_login(self.reader)
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                client.get(url)
+                self.assertIsNotNone(client.get(url).context)
+
+    def test_new_post_invalidates(self):
+        """Новый пост сразу виден на странице группы и профиля."""
+        for url in self.urls.values():
+            self.client.get(url)
+        Post.objects.create(
+            author=self.author, text='Второй пост', group=self.group)
+        for name in ('group', 'profile'):
+            with self.subTest(page=name):
+                response = self.client.get(self.urls[name])
+                self.assertContains(response, 'Второй пост')
+
+    def test_post_edit_and_comment_invalidate(self):
+        """Изменение поста и новый комментарий видны на странице поста."""
+        self.client.get(self.urls['post'])
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.assertContains(
+            self.client.get(self.urls['post']), 'Исправленный пост')
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Новый комментарий')
+        self.assertContains(
+            self.client.get(self.urls['post']), 'Новый комментарий')
+
+    def test_group_rename_invalidates_post(self):
+        """Переименование группы видно на странице поста и меняет ETag."""
+        response = self.client.get(self.urls['post'])
+        self.assertContains(response, 'Группа')
+        self.group.title = 'Новое название'
+        self.group.slug = 'renamed'
+        self.group.save()
+        renamed = self.client.get(
+            self.urls['post'], HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(renamed.status_code, 200)
+        self.assertContains(renamed, 'Новое название')
+        self.assertContains(
+            renamed, reverse('posts:group_list', kwargs={'slug': 'renamed'}))
+
+    def test_follow_invalidates_profile(self):
+        """Подписка меняет счетчик подписчиков в закэшированном профиле."""
+        self.assertContains(
+            self.client.get(self.urls['profile']), 'Подписчиков: 0')
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'Author'}))
+        self.assertTrue(Follow.objects.exists())
+        self.assertContains(
+            self.client.get(self.urls['profile']), 'Подписчиков: 1')
+
+
+class ObjectCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(title='Группа', slug='old-slug')
+
+    def test_group_cached(self):
+        """Группа по slug берется из кэша без запроса к базе."""
+        caching.get_group('old-slug')
+        with self.assertNumQueries(0):
+            self.assertEqual(caching.get_group('old-slug'), self.group)
+
+    def test_group_slug_change(self):
+        """После смены slug группа по старому адресу не находится."""
+        caching.get_group('old-slug')
+        self.group.slug = 'new-slug'
+        self.group.save()
+        with self.assertRaises(Http404):
+            caching.get_group('old-slug')
+        self.assertEqual(caching.get_group('new-slug'), self.group)
+
+    def test_username_change(self):
+        """Смена username сбрасывает старый профиль и посты автора."""
+        author = User.objects.create_user(username='old-name')
+        post = Post.objects.create(author=author, text='Пост')
+        caching.get_author('old-name')
+        caching.get_post(post.pk)
+        author.username = 'new-name'
+        author.save()
+        with self.assertRaises(Http404):
+            caching.get_author('old-name')
+        self.assertEqual(caching.get_author('new-name'), author)
+        self.assertEqual(
+            caching.get_post(post.pk).author.username, 'new-name')
+
+    def test_login_keeps_author_version(self):
+        """Вход пользователя не сбрасывает кэш его страниц."""
+        user = User.objects.create_user(username='login', password='pass')
+        key = caching.AUTHOR_VERSION_KEY.format(user.pk)
+        version = caching.version(key)
+        self.assertTrue(self.client.login(username='login', password='pass'))
+        self.assertEqual(caching.version(key), version)
+
+    def test_author_private_fields_not_cached(self):
+        """В кэш автора не попадают пароль и email."""
+        author = User.objects.create_user(
+            username='private', email='private@example.com',
+            password='secret', first_name='Имя')
+        post = Post.objects.create(author=author, text='Пост')
+        cached = [
+            caching.get_author('private'),
+            caching.get_post(post.pk).author,
+        ]
+        for user in cached:
+            with self.subTest(user=user):
+                self.assertEqual(user.get_full_name(), 'Имя')
+                self.assertEqual(
+                    user.get_deferred_fields() & {'password', 'email'},
+                    {'password', 'email'})
+        for key in (caching.USER_KEY.format(caching.hashed('private')),
+                    caching.POST_KEY.format(post.pk)):
+            self.assertNotIn(author.password.encode(),
+                             pickle.dumps(cache.get(key)))
+
+    def test_missing_object(self):
+        """Отсутствующий объект дает 404 и не кэшируется."""
+        with self.assertRaises(Http404):
+            caching.get_post(100500)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 100500}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(title='Группа', slug='conditional')
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        # Тесты меняют пост в базе, а откат транзакции объект не вернет
+        self.post.refresh_from_db()
+        self.urls = {
+            'group': reverse(
+                'posts:group_list', kwargs={'slug': 'conditional'}),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': 'Author'}),
+            'post': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}),
+        }
+
+    def revalidate(self, client, url, response):
+        return client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+
+    def test_not_modified(self):
+        """Неизменившаяся страница отдается как 304 без запросов к базе."""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('ETag', response)
+                self.assertEqual(
+                    response['Last-Modified'], http_date(
+                        self.post.modified.timestamp()))
+                with self.assertNumQueries(0):
+                    revalidated = self.revalidate(
+                        self.client, url, response)
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertEqual(revalidated.content, b'')
+
+    def test_edit_changes_validators(self):
+        """Правка поста меняет ETag и Last-Modified его страниц."""
+        responses = {
+            name: self.client.get(url) for name, url in self.urls.items()}
+        Post.objects.filter(pk=self.post.pk).update(
+            modified=timezone.now() - timedelta(days=1))
+        self.post.refresh_from_db()
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.assertGreater(
+            self.post.modified, timezone.now() - timedelta(minutes=1))
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.revalidate(self.client, url, responses[name])
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Исправленный пост')
+
+    def test_comment_changes_post(self):
+        """Новый комментарий меняет Last-Modified страницы поста."""
+        url = self.urls['post']
+        response = self.client.get(url)
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        fresh = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(
+            comment.modified.timestamp() - 1))
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh['ETag'], response['ETag'])
+        self.assertEqual(
+            self.revalidate(self.client, url, response).status_code, 200)
+
+    def test_delete_changes_etag(self):
+        """Удаление поста меняет ETag профиля, хотя modified не растет."""
+        older = Post.objects.create(author=self.author, text='Старый пост')
+        Post.objects.filter(pk=older.pk).update(
+            modified=self.post.modified - timedelta(days=1))
+        url = self.urls['profile']
+        response = self.client.get(url)
+        older.delete()
+        self.assertEqual(
+            self.revalidate(self.client, url, response).status_code, 200)
+
+    def test_etag_per_user(self):
+        """У авторизованного пользователя свой ETag."""
+        url = self.urls['post']
+        anonymous = self.client.get(url)
+        client = Client()
+        client.force_login(self.reader)
+        authorized = client.get(url)
+        self.assertNotEqual(anonymous['ETag'], authorized['ETag'])
+        self.assertEqual(
+            self.revalidate(client, url, anonymous).status_code, 200)
+        self.assertEqual(
+            self.revalidate(client, url, authorized).status_code, 304)
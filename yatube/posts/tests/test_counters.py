@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from yatube.settings import TIMELINE_BACKFILL
+from .. import counters, timeline
+from ..models import Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='Counted')
+        self.reader = User.objects.create_user(username='Reader')
+        self.group = Group.objects.create(title='Группа', slug='counted')
+        self.other_group = Group.objects.create(title='Другая', slug='other')
+        for i in range(3):
+            Post.objects.create(
+                author=self.author, text=f'Пост {i}', group=self.group)
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def assert_counts(self, total, group, author):
+        self.assertEqual(counters.posts_count(), total)
+        self.assertEqual(counters.group_posts_count(self.group.pk), group)
+        self.assertEqual(counters.author_posts_count(self.author.pk), author)
+        self.assertEqual(counters.follow_posts_count(self.reader.pk), author)
+
+    def test_counts_are_cached(self):
+        """Повторное чтение счетчиков не обращается к таблице постов."""
+        self.assert_counts(3, 3, 3)
+        with self.assertNumQueries(1):
+            counters.posts_count()
+            counters.group_posts_count(self.group.pk)
+            counters.author_posts_count(self.author.pk)
+            counters.follow_posts_count(self.reader.pk)
+
+    def test_create_and_delete(self):
+        """Создание и удаление поста меняют счетчики без пересчета."""
+        self.assert_counts(3, 3, 3)
+        post = Post.objects.create(
+            author=self.author, text='Новый', group=self.group)
+        self.assert_counts(4, 4, 4)
+        post.delete()
+        self.assert_counts(3, 3, 3)
+
+    def test_regroup(self):
+        """Перенос поста в другую группу переносит его в счетчиках групп."""
+        self.assert_counts(3, 3, 3)
+        post = Post.objects.filter(author=self.author).first()
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(counters.group_posts_count(self.group.pk), 2)
+        self.assertEqual(
+            counters.group_posts_count(self.other_group.pk), 1)
+
+    def test_follow_count_follows_subscriptions(self):
+        """Счетчик ленты подписок учитывает отписку сразу."""
+        self.assert_counts(3, 3, 3)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(counters.follow_posts_count(self.reader.pk), 0)
+
+    def test_follow_count_single_query(self):
+        """Непосчитанные авторы ленты подписок считаются одним запросом."""
+        for i in range(5):
+            author = User.objects.create_user(username=f'Author{i}')
+            Post.objects.create(author=author, text='Пост')
+            UserStats.objects.update_or_create(
+                user=author, defaults={'follower_count': 1})
+            Follow.objects.create(user=self.reader, author=author)
+        cache.clear()
+        with mock.patch.object(timeline, 'TIMELINE_FANOUT_LIMIT', 0):
+            with self.assertNumQueries(3):
+                self.assertEqual(
+                    counters.follow_posts_count(self.reader.pk), 8)
+            with self.assertNumQueries(1):
+                self.assertEqual(
+                    counters.follow_posts_count(self.reader.pk), 8)
+
+    def test_follow_count_matches_timeline(self):
+        """Счетчик ленты подписок равен числу постов в ней."""
+        Post.objects.bulk_create([
+            Post(author=self.author, text=f'Старый {i}')
+            for i in range(TIMELINE_BACKFILL)
+        ])
+        Follow.objects.filter(user=self.reader).delete()
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(author=self.author, text='Новый')
+        feed = timeline.follow_feed(self.reader)
+        self.assertEqual(feed.count(), TIMELINE_BACKFILL + 1)
+        self.assertEqual(
+            counters.follow_posts_count(self.reader.pk), feed.count())
+        Post.objects.filter(author=self.author).first().delete()
+        self.assertEqual(
+            counters.follow_posts_count(self.reader.pk), feed.count())
+
+    def test_estimated_total(self):
+        """Для большой таблицы общий счетчик берется по оценке."""
+        last_pk = Post.objects.latest('pk').pk
+        Post.objects.order_by('pk').first().delete()
+        cache.clear()
+        with mock.patch.object(counters, 'POSTS_COUNT_ESTIMATE_THRESHOLD', 0):
+            self.assertEqual(counters.posts_count(), last_pk)
+        cache.clear()
+        self.assertEqual(counters.posts_count(), 2)
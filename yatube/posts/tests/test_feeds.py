@@ -0,0 +1,129 @@
+from datetime import timedelta
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from yatube.settings import FEED_ITEMS_LIMIT
+from ..models import Group, Post
+from ..seed import explicit_created
+
+User = get_user_model()
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class FeedsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='feeds', description='Описание')
+        now = timezone.now()
+        with explicit_created(Post):
+            Post.objects.bulk_create([
+                Post(author=cls.author if i % 2 else cls.other,
+                     text=f'Пост {i}', group=cls.group if i % 3 else None,
+                     created=now - timedelta(minutes=i), modified=now)
+                for i in range(FEED_ITEMS_LIMIT + 5)
+            ])
+
+    def setUp(self):
+        cache.clear()
+        self.urls = {
+            'index': (reverse('posts:index_rss'),
+                      reverse('posts:index_atom'), Post.objects.all()),
+            'group': (
+                reverse('posts:group_rss', kwargs={'slug': 'feeds'}),
+                reverse('posts:group_atom', kwargs={'slug': 'feeds'}),
+                Post.objects.filter(group=self.group)),
+            'profile': (
+                reverse('posts:profile_rss', kwargs={'username': 'Author'}),
+                reverse('posts:profile_atom', kwargs={'username': 'Author'}),
+                Post.objects.filter(author=self.author)),
+        }
+
+    def expected(self, posts):
+        return list(posts.order_by('-created').values_list(
+            'text', flat=True)[:FEED_ITEMS_LIMIT])
+
+    def test_items(self):
+        """Ленты отдают последние посты страницы, новые сначала."""
+        for name, (rss, atom, posts) in self.urls.items():
+            with self.subTest(feed=name):
+                response = self.client.get(rss)
+                self.assertEqual(
+                    response['Content-Type'], 'application/rss+xml; '
+                                              'charset=utf-8')
+                root = ElementTree.fromstring(response.content)
+                self.assertEqual(
+                    [item.findtext('title')
+                     for item in root.iter('item')],
+                    self.expected(posts))
+                response = self.client.get(atom)
+                root = ElementTree.fromstring(response.content)
+                self.assertEqual(
+                    [entry.findtext(f'{ATOM}title')
+                     for entry in root.iter(f'{ATOM}entry')],
+                    self.expected(posts))
+
+    def test_links(self):
+        """Страницы ссылаются на свои ленты."""
+        pages = {
+            reverse('posts:index'): 'index',
+            reverse('posts:group_list', kwargs={'slug': 'feeds'}): 'group',
+            reverse('posts:profile', kwargs={'username': 'Author'}):
+                'profile',
+        }
+        for url, name in pages.items():
+            with self.subTest(page=name):
+                rss, atom, _ = self.urls[name]
+                response = self.client.get(url)
+                self.assertContains(response, f'href="{rss}"')
+                self.assertContains(response, f'href="{atom}"')
+
+    def test_cached_and_not_modified(self):
+        """Повторная лента берется из кэша, а с валидаторами — 304."""
+        for name, (rss, atom, _) in self.urls.items():
+            for url in (rss, atom):
+                with self.subTest(url=url):
+                    response = self.client.get(url)
+                    with self.assertNumQueries(0):
+                        self.assertEqual(
+                            self.client.get(url).content, response.content)
+                    with self.assertNumQueries(0):
+                        revalidated = self.client.get(
+                            url,
+                            HTTP_IF_NONE_MATCH=response['ETag'],
+                            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+                        )
+                    self.assertEqual(revalidated.status_code, 304)
+
+    def test_new_post_refreshes(self):
+        """Новый пост сразу попадает в ленты и меняет ETag."""
+        responses = {
+            name: self.client.get(rss)
+            for name, (rss, _, _) in self.urls.items()
+        }
+        Post.objects.create(
+            author=self.author, group=self.group, text='Свежий пост')
+        for name, (rss, _, _) in self.urls.items():
+            with self.subTest(feed=name):
+                response = self.client.get(
+                    rss, HTTP_IF_NONE_MATCH=responses[name]['ETag'])
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Свежий пост')
+
+    def test_unknown(self):
+        """Лента несуществующей группы или автора — 404."""
+        urls = [
+            reverse('posts:group_rss', kwargs={'slug': 'none'}),
+            reverse('posts:profile_atom', kwargs={'username': 'none'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
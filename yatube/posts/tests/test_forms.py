@@ -1,18 +1,24 @@
 import shutil
 import tempfile
+from io import BytesIO
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
+from .. import forms
 from ..forms import PostForm
 from ..models import Comment, Group, Post
 
 User = get_user_model()
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+# Картинка называется по SHA-256 содержимого: posts/ab/cd/abcd....webp
+IMAGE_NAME = r'^posts/[0-9a-f]{{2}}/[0-9a-f]{{2}}/[0-9a-f]{{64}}\.{}$'
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -85,11 +91,11 @@ class PostFormsTests(TestCase):
         fields = {
             ordered_posts.text: form_data['text'],
             ordered_posts.group.pk: form_data['group'],
-            ordered_posts.image: f'posts/{uploaded.name}',
         }
         for field, value in fields.items():
             with self.subTest():
                 self.assertEqual(field, value)
+        self.assertRegex(ordered_posts.image.name, IMAGE_NAME.format('gif'))
         self.assertRedirects(response, reverse(
             reverse_name, kwargs=kwargs))
         self.assertEqual(Post.objects.count(), posts_count + 1)
@@ -127,3 +133,99 @@ class PostFormsTests(TestCase):
                 text=form_data['text'],
             ), 'Комментарий не найден'
         )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, name, size, image_format, **options):
+        file = BytesIO()
+        Image.new('RGB', size, (200, 40, 40)).save(file, image_format,
+                                                   **options)
+        return SimpleUploadedFile(name, file.getvalue())
+
+    def create_post(self, image):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с фото', 'image': image},
+        )
+
+    def test_photo_reencoded(self):
+        """Фото уменьшается, перекодируется в WebP и теряет EXIF."""
+        exif = Image.Exif()
+        exif[0x0110] = 'Camera'
+        exif[0x0112] = 6
+        photo = self.upload(
+            'photo.jpg', (3000, 2000), 'JPEG', exif=exif.tobytes())
+        self.create_post(photo)
+        post = Post.objects.get(text='Пост с фото')
+        self.assertRegex(post.image.name, IMAGE_NAME.format('webp'))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'WEBP')
+            # Поворот из EXIF применен, большая сторона уменьшена.
+            self.assertEqual(image.size, (1280, 1920))
+            self.assertNotIn('exif', image.info)
+        self.assertEqual((post.image_width, post.image_height), (1280, 1920))
+        self.assertEqual(post.image_size, post.image.size)
+
+    @mock.patch.object(forms, 'IMAGE_FORMAT', 'JPEG')
+    def test_progressive_jpeg(self):
+        """Картинка может перекодироваться в прогрессивный JPEG."""
+        self.create_post(self.upload('scan.png', (100, 50), 'PNG'))
+        post = Post.objects.get(text='Пост с фото')
+        self.assertRegex(post.image.name, IMAGE_NAME.format('jpg'))
+        with Image.open(post.image.path) as image:
+            self.assertTrue(image.info.get('progressive'))
+        self.assertEqual((post.image_width, post.image_height), (100, 50))
+
+    def test_gif_kept(self):
+        """GIF сохраняется без перекодирования."""
+        animation = self.upload('anim.gif', (30, 20), 'GIF')
+        content = animation.read()
+        animation.seek(0)
+        self.create_post(animation)
+        post = Post.objects.get(text='Пост с фото')
+        with post.image.open('rb') as file:
+            self.assertEqual(file.read(), content)
+        self.assertEqual((post.image_width, post.image_height), (30, 20))
+
+    def test_image_cleared(self):
+        """Вместе с убранной картинкой сбрасываются ее размеры."""
+        self.create_post(self.upload('anim.gif', (30, 20), 'GIF'))
+        post = Post.objects.get(text='Пост с фото')
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={'text': 'Без фото', 'image-clear': 'on'},
+        )
+        post.refresh_from_db()
+        self.assertFalse(post.image)
+        self.assertEqual(
+            (post.image_width, post.image_height, post.image_size),
+            (None, None, None))
+
+    def test_limits(self):
+        """Слишком большие файлы и разрешения отклоняются."""
+        with mock.patch.object(forms, 'IMAGE_MAX_UPLOAD_SIZE', 100):
+            response = self.create_post(
+                self.upload('big.png', (300, 300), 'PNG'))
+        self.assertFormError(
+            response, 'form', 'image', 'Картинка больше 100\xa0байт.')
+        with mock.patch.object(forms, 'IMAGE_MAX_PIXELS', 100):
+            response = self.create_post(
+                self.upload('wide.png', (20, 10), 'PNG'))
+        self.assertFormError(
+            response, 'form', 'image', 'Слишком большое разрешение.')
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,101 @@
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'План запроса проверяется в SQLite')
+class FeedIndexesTestCase(TestCase):
+    """Запросы лент идут по индексу без сортировки во временном B-дереве."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Indexed')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(title='Группа', slug='indexed')
+        for i in range(30):
+            post = Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group)
+        for i in range(30):
+            Comment.objects.create(
+                post=post, author=cls.reader, text=f'Коммент {i}')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = post
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def feed_plans(self, url, table):
+        """Планы запросов страниц ленты, которые выполнил view."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+            cursor = response.context['page_obj'].next_cursor
+            self.authorized_client.get(url, {'cursor': cursor})
+        return [
+            self.explain(query['sql']) for query in queries
+            if f'FROM "{table}"' in query['sql'] and 'LIMIT' in query['sql']
+        ]
+
+    def assert_index_scans(self, url, table, index):
+        with mock.patch('posts.views.POSTS_CURSOR_PAGINATION', True):
+            plans = self.feed_plans(url, table)
+        self.assertEqual(len(plans), 2)
+        for plan in plans:
+            with self.subTest(plan=plan):
+                self.assertTrue(any(index in step for step in plan))
+                self.assertFalse(any('TEMP B-TREE' in step for step in plan))
+
+    def test_index(self):
+        self.assert_index_scans(
+            reverse('posts:index'), 'posts_post', 'post_created_idx')
+
+    def test_group(self):
+        self.assert_index_scans(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            'posts_post', 'post_group_created_idx')
+
+    def test_profile(self):
+        self.assert_index_scans(
+            reverse('posts:profile', kwargs={'username': self.author}),
+            'posts_post', 'post_author_created_idx')
+
+    def test_follow(self):
+        self.assert_index_scans(
+            reverse('posts:follow_index'), 'posts_post', 'timeline_user_feed')
+
+    def test_comments(self):
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        plans = [
+            self.explain(query['sql']) for query in queries
+            if 'FROM "posts_comment"' in query['sql']
+        ]
+        self.assertEqual(len(plans), 1)
+        self.assertTrue(
+            any('comment_post_created_idx' in step for step in plans[0]))
+        self.assertFalse(any('TEMP B-TREE' in step for step in plans[0]))
+
+    def test_followers_lookup(self):
+        """Подписчики автора при раскладке постов читаются из индекса."""
+        queryset = Follow.objects.filter(author=self.author).values_list(
+            'user_id', flat=True)
+        plan = self.explain(str(queryset.query))
+        self.assertTrue(
+            any('COVERING INDEX follow_author_user_idx' in step
+                for step in plan))
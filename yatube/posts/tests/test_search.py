@@ -0,0 +1,117 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Writer')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.ferry = Post.objects.create(
+            author=cls.author, text='Паром через Волгу ходит по утрам')
+        cls.bridge = Post.objects.create(
+            author=cls.author,
+            text='Мост через Волгу. Волгу видно с моста, Волгу!')
+        cls.forest = Post.objects.create(
+            author=cls.author, text='Прогулка по лесу')
+        cls.comment = Comment.objects.create(
+            post=cls.forest, author=cls.reader,
+            text='А я видел паром у леса')
+
+    def test_words_and_prefixes(self):
+        """Находятся посты со всеми словами запроса, в том числе по началу."""
+        cases = {
+            'волгу': [self.bridge.pk, self.ferry.pk],
+            'Паром Волг': [self.ferry.pk],
+            'прогулк': [self.forest.pk],
+            'самолет': [],
+            '!!!': [],
+        }
+        for query, expected in cases.items():
+            with self.subTest(query=query):
+                self.assertEqual(
+                    search.search(Post, query), expected)
+
+    def test_comments_lead_to_posts(self):
+        """Пост находится по комментарию, но ниже совпадения в тексте."""
+        self.assertEqual(
+            search.search_posts('паром'), [self.ferry.pk, self.forest.pk])
+        self.assertEqual(
+            search.search(Comment, 'паром'), [self.comment.pk])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        self.ferry.text = 'Катер'
+        self.ferry.save()
+        self.assertEqual(search.search(Post, 'паром'), [])
+        self.assertEqual(search.search(Post, 'катер'), [self.ferry.pk])
+        Post.objects.filter(pk=self.forest.pk).delete()
+        self.assertEqual(search.search(Comment, 'паром'), [])
+        self.assertEqual(search.search_posts('лес'), [])
+
+    def test_rebuild(self):
+        """rebuild_search восстанавливает индекс после bulk_create."""
+        Post.objects.bulk_create(
+            [Post(author=self.author, text='Загружено без сигналов')])
+        self.assertEqual(search.search(Post, 'сигналов'), [])
+        call_command('rebuild_search', stdout=StringIO())
+        self.assertEqual(len(search.search(Post, 'сигналов')), 1)
+        self.assertEqual(
+            search.search(Post, 'волгу'), [self.bridge.pk, self.ferry.pk])
+
+    def test_uses_index(self):
+        """Поиск не читает тексты постов через LIKE."""
+        with CaptureQueriesContext(connection) as queries:
+            search.search_posts('волгу')
+        self.assertFalse(any('LIKE' in query['sql'] for query in queries))
+
+    def test_search_page(self):
+        """Страница поиска показывает найденные посты по релевантности."""
+        response = self.client.get(reverse('posts:search'), {'q': 'волгу'})
+        self.assertEqual(
+            list(response.context['page_obj']), [self.bridge, self.ferry])
+        self.assertEqual(response.context['query'], 'волгу')
+        response = self.client.get(reverse('posts:search'))
+        self.assertEqual(list(response.context['page_obj']), [])
+
+    def test_search_page_pagination(self):
+        """Ссылки на страницы результатов сохраняют запрос."""
+        Post.objects.bulk_create([
+            Post(author=self.author, text=f'Волга {i}') for i in range(15)])
+        call_command('rebuild_search', stdout=StringIO())
+        response = self.client.get(reverse('posts:search'), {'q': 'волга'})
+        self.assertContains(response, '?q=%D0%B2%D0%BE%D0%BB%D0%B3%D0%B0&amp;'
+                                      'page=2')
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'волга', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 5)
+
+    def test_admin_search(self):
+        """Поиск в админке идет по индексу."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        url = reverse('admin:posts_post_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'q': 'волгу'})
+        self.assertEqual(
+            set(response.context['cl'].result_list),
+            {self.ferry, self.bridge})
+        self.assertFalse(any(
+            'LIKE' in query['sql'] and 'posts_post' in query['sql']
+            for query in queries))
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'паром'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.comment])
@@ -0,0 +1,65 @@
+import random
+from collections import Counter
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F, Min
+from django.test import TestCase
+
+from ..models import Comment, Follow, Post, TimelineEntry, User, UserStats
+from ..seed import power_law_index, seed_dataset
+
+SIZES = {'users': 40, 'groups': 3, 'posts': 300, 'follows': 200,
+         'comments': 200}
+
+
+class SeedTestCase(TestCase):
+    def dataset(self):
+        """Сгенерированные данные без привязки к значениям ключей."""
+        first_user = User.objects.aggregate(first=Min('pk'))['first']
+        posts = Post.objects.order_by('pk').values_list(
+            'author_id', 'text', 'created')
+        follows = Follow.objects.order_by('pk').values_list(
+            'user_id', 'author_id')
+        return (
+            [(author - first_user, text) for author, text, _ in posts],
+            [(user - first_user, author - first_user)
+             for user, author in follows],
+        )
+
+    def test_seed_yatube(self):
+        """Команда создает данные, счетчики и ленты подписок."""
+        call_command('seed_yatube', workers=1, batch_size=50,
+                     stdout=StringIO(), **SIZES)
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 200)
+        self.assertTrue(Follow.objects.exists())
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+        self.assertEqual(UserStats.objects.count(), 40)
+        self.assertTrue(TimelineEntry.objects.exists())
+
+    def test_realistic_dates(self):
+        """Посты идут по времени в порядке ключей, комментарии — после них."""
+        seed_dataset(**SIZES, days=30)
+        created = list(Post.objects.order_by('pk').values_list(
+            'created', flat=True))
+        self.assertEqual(created, sorted(created))
+        self.assertLess(created[0], created[-1])
+        self.assertFalse(Comment.objects.filter(
+            created__lt=F('post__created')).exists())
+
+    def test_reproducible_with_workers(self):
+        """Один seed дает одинаковые данные при любом числе процессов."""
+        seed_dataset(**SIZES, seed=7, batch_size=64)
+        first = self.dataset()
+        User.objects.all().delete()
+        seed_dataset(**SIZES, seed=7, batch_size=64, workers=2)
+        self.assertEqual(self.dataset(), first)
+
+    def test_power_law(self):
+        """Малые индексы выпадают заметно чаще больших."""
+        rnd = random.Random(0)
+        counts = Counter(power_law_index(rnd, 100) for _ in range(10000))
+        self.assertEqual(set(counts) - set(range(100)), set())
+        self.assertGreater(counts[0], 10 * counts[50])
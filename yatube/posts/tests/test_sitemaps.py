@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import sitemaps
+from ..models import Group, Post
+
+User = get_user_model()
+
+NS = {'sm': sitemaps.XMLNS}
+BASE_URL = 'https://yatube.test'
+SIZE = 3
+
+
+class SitemapsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.silent = User.objects.create_user(username='Silent')
+        cls.group = Group.objects.create(
+            title='Группа', slug='sitemaps', description='Описание')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {i}')
+            for i in range(7)
+        ]
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def build(self):
+        return sitemaps.build(self.root, BASE_URL, SIZE)
+
+    def read(self, name):
+        return ElementTree.parse(os.path.join(self.root, name)).getroot()
+
+    def locations(self):
+        """Все адреса карты, пройденные от индекса."""
+        locations = []
+        for sitemap in self.read(sitemaps.INDEX).findall('sm:sitemap', NS):
+            name = sitemap.findtext('sm:loc', namespaces=NS).rsplit('/')[-1]
+            root = self.read(name)
+            locations += [
+                url.findtext('sm:loc', namespaces=NS)
+                for url in root.findall('sm:url', NS)
+            ]
+            self.assertLessEqual(len(root), SIZE)
+        return locations
+
+    def test_urls(self):
+        """Карта содержит посты, группы и профили авторов."""
+        self.build()
+        expected = [
+            f'{BASE_URL}/posts/{post.pk}/' for post in self.posts
+        ] + [f'{BASE_URL}/group/sitemaps/', f'{BASE_URL}/profile/Author/']
+        self.assertEqual(self.locations(), expected)
+
+    def test_incremental(self):
+        """Повторная сборка переписывает только изменившиеся части."""
+        first = self.build()
+        self.assertEqual(first['kept'], 0)
+        self.assertEqual(self.build(), {
+            'written': 0, 'kept': first['written'], 'removed': 0})
+        self.posts[-1].text = 'Правка'
+        self.posts[-1].save()
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertEqual(self.build(), {
+            'written': 2, 'kept': first['written'] - 2, 'removed': 0})
+        self.assertIn(f'{BASE_URL}/group/renamed/', self.locations())
+
+    def test_removes_empty_chunks(self):
+        """Часть без строк удаляется вместе с файлом."""
+        self.build()
+        first = self.posts[0].pk // SIZE
+        name = f'sitemap-posts-{first}.xml'
+        self.assertTrue(os.path.exists(os.path.join(self.root, name)))
+        Post.objects.filter(pk__lt=(first + 1) * SIZE).delete()
+        self.assertEqual(self.build()['removed'], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.root, name)))
+        self.assertNotIn(
+            f'{BASE_URL}/posts/{self.posts[0].pk}/', self.locations())
+
+    def test_command(self):
+        """build_sitemaps пишет карту в указанный каталог."""
+        out = StringIO()
+        call_command(
+            'build_sitemaps', root=self.root, base_url=BASE_URL + '/',
+            chunk_size=SIZE, stdout=out)
+        self.assertIn(f'{BASE_URL}/sitemaps/sitemap.xml', out.getvalue())
+        self.assertEqual(len(self.locations()), 9)
@@ -0,0 +1,139 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class UserStatsViewsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='Counter')
+        self.author = User.objects.create_user(username='Author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assert_stats(self, user, **expected):
+        stats = UserStats.objects.get(pk=user.pk)
+        for field, value in expected.items():
+            with self.subTest(field=field):
+                self.assertEqual(getattr(stats, field), value)
+
+    def test_post_create(self):
+        """Создание поста увеличивает post_count автора."""
+        UserStats.objects.for_user(self.user.pk)
+        self.authorized_client.post(
+            reverse('posts:post_create'), data={'text': 'Новый пост'})
+        self.assert_stats(self.user, post_count=1)
+
+    def test_add_comment(self):
+        """Комментарий увеличивает счетчики поста и автора комментария."""
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Комментарий'},
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assert_stats(self.user, comment_count=1)
+
+    def test_follow_unfollow(self):
+        """Подписка и отписка меняют счетчики обеих сторон один раз."""
+        follow = reverse(
+            'posts:profile_follow', kwargs={'username': self.author})
+        unfollow = reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author})
+        self.authorized_client.get(follow)
+        self.authorized_client.get(follow)
+        self.assert_stats(self.user, following_count=1)
+        self.assert_stats(self.author, follower_count=1, post_count=1)
+        self.authorized_client.get(unfollow)
+        self.authorized_client.get(unfollow)
+        self.assert_stats(self.user, following_count=0)
+        self.assert_stats(self.author, follower_count=0)
+
+    def test_profile_uses_stats(self):
+        """Профиль берет количество постов из статистики."""
+        UserStats.objects.for_user(self.author.pk)
+        UserStats.objects.filter(pk=self.author.pk).update(post_count=42)
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.author}))
+        self.assertEqual(response.context['a_posts_count'], 42)
+
+
+class UserStatsSignalsTestCase(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+        self.reader = User.objects.create_user(username='Reader')
+
+    def stats(self, user):
+        return UserStats.objects.for_user(user.pk)
+
+    def test_orm_changes(self):
+        """Счетчики меняются при создании и удалении через ORM."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Post.objects.create(author=self.author, text='Еще пост')
+        Comment.objects.create(post=post, author=self.reader, text='Коммент')
+        Follow.objects.create(user=self.reader, author=self.author)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(self.stats(self.author).post_count, 2)
+        self.assertEqual(self.stats(self.author).follower_count, 1)
+        self.assertEqual(self.stats(self.reader).comment_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        post.delete()
+        Follow.objects.all().delete()
+        self.assertEqual(self.stats(self.author).post_count, 1)
+        self.assertEqual(self.stats(self.author).follower_count, 0)
+        self.assertEqual(self.stats(self.reader).comment_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_profile_after_delete(self):
+        """Профиль показывает число постов после удаления не из view."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(3)
+        ]
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        self.assertEqual(self.client.get(url).context['a_posts_count'], 3)
+        posts[0].delete()
+        self.assertEqual(self.client.get(url).context['a_posts_count'], 2)
+
+    def test_user_delete(self):
+        """Удаление пользователя каскадом не ломается на счетчиках."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.reader, text='Коммент')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.reader.delete()
+        self.assertFalse(UserStats.objects.filter(pk=self.reader.pk).exists())
+        self.assertEqual(self.stats(self.author).follower_count, 0)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+
+
+class RebuildStatsTestCase(TestCase):
+    def test_rebuild(self):
+        """rebuild_stats пересчитывает все счетчики с нуля."""
+        author = User.objects.create_user(username='Author')
+        reader = User.objects.create_user(username='Reader')
+        post = Post.objects.create(author=author, text='Пост')
+        Post.objects.create(author=author, text='Еще пост')
+        Comment.objects.create(post=post, author=reader, text='Коммент')
+        Follow.objects.create(user=reader, author=author)
+        UserStats.objects.filter(pk=author.pk).update(post_count=100)
+        call_command('rebuild_stats', batch_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        expected = {
+            author.pk: (2, 1, 0, 0),
+            reader.pk: (0, 0, 1, 1),
+        }
+        stats = UserStats.objects.values_list(
+            'pk', 'post_count', 'follower_count', 'following_count',
+            'comment_count')
+        self.assertEqual(
+            {row[0]: row[1:] for row in stats}, expected)
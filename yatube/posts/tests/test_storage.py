@@ -0,0 +1,115 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import thumbnails
+from ..models import Post, ReleasedImage, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+OTHER_GIF = SMALL_GIF[:-3] + b'\x0B\x00\x3B'
+
+
+def run_on_commit(func):
+    func()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch('django.db.transaction.on_commit', run_on_commit)
+@mock.patch.object(thumbnails, 'THUMBNAIL_WORKERS', 0)
+class ContentAddressedStorageTestCase(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='Uploader')
+
+    def create_post(self, content=SMALL_GIF, name='small.GIF'):
+        return Post.objects.create(
+            author=self.user, text='С картинкой',
+            image=SimpleUploadedFile(name, content, 'image/gif'),
+        )
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name))
+
+    def test_name_from_content(self):
+        """Файл называется по хешу содержимого и лежит в подкаталогах."""
+        digest = hashlib.sha256(SMALL_GIF).hexdigest()
+        post = self.create_post()
+        self.assertEqual(
+            post.image.name,
+            f'posts/{digest[:2]}/{digest[2:4]}/{digest}.gif')
+        self.assertTrue(self.exists(post.image.name))
+
+    def test_same_content_stored_once(self):
+        """Одинаковые картинки разных постов хранятся одним файлом."""
+        first = self.create_post(name='first.gif')
+        second = self.create_post(name='second.gif')
+        other = self.create_post(OTHER_GIF)
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        directory = os.path.dirname(
+            os.path.join(TEMP_MEDIA_ROOT, first.image.name))
+        self.assertEqual(os.listdir(directory),
+                         [os.path.basename(first.image.name)])
+
+    def test_file_deleted_with_last_post(self):
+        """Файл удаляется вместе с последним ссылающимся на него постом."""
+        first = self.create_post()
+        second = self.create_post()
+        name = first.image.name
+        first.delete()
+        thumbnails.sweep(grace=0)
+        self.assertTrue(self.exists(name))
+        second.delete()
+        self.assertTrue(self.exists(name))
+        thumbnails.sweep(grace=0)
+        self.assertFalse(self.exists(name))
+        self.assertFalse(ReleasedImage.objects.exists())
+
+    def test_replaced_image_released(self):
+        """Замененная картинка удаляется, если больше ни у кого ее нет."""
+        post = self.create_post()
+        old_name = post.image.name
+        post.image = SimpleUploadedFile('new.gif', OTHER_GIF, 'image/gif')
+        post.save()
+        thumbnails.sweep(grace=0)
+        self.assertFalse(self.exists(old_name))
+        self.assertTrue(self.exists(post.image.name))
+
+    def test_reused_file_kept(self):
+        """Файл, снова сохраненный после освобождения, не удаляется."""
+        post = self.create_post()
+        name = post.image.name
+        post.delete()
+        hours_ago = time.time() - 2 * 60 * 60
+        os.utime(os.path.join(TEMP_MEDIA_ROOT, name),
+                 (hours_ago, hours_ago))
+        ReleasedImage.objects.filter(name=name).update(
+            released=timezone.now() - timedelta(hours=2))
+        storage = Post._meta.get_field('image').storage
+        # Пост с тем же файлом еще в незакоммиченной транзакции
+        self.assertEqual(storage.save('posts/again.gif', SimpleUploadedFile(
+            'again.gif', SMALL_GIF, 'image/gif')), name)
+        self.assertEqual(thumbnails.sweep(grace=60), 0)
+        self.assertTrue(self.exists(name))
+        self.assertTrue(ReleasedImage.objects.filter(name=name).exists())
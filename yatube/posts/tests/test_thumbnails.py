@@ -0,0 +1,141 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+
+from .. import thumbnails
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+# sorl-thumbnail 12.7 масштабирует через Image.ANTIALIAS (Pillow < 10)
+requires_resize = skipUnless(
+    hasattr(Image, 'ANTIALIAS'), 'sorl-thumbnail требует Pillow < 10')
+
+
+def run_on_commit(func):
+    func()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTestCase(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='Painter')
+
+    def create_post(self):
+        return Post.objects.create(
+            author=self.user, text='С картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    def thumbnail(self, post):
+        geometry, options = thumbnails.THUMBNAIL_PRESETS[0]
+        return get_thumbnail(post.image, geometry, **options)
+
+    def thumbnail_path(self, post):
+        return os.path.join(TEMP_MEDIA_ROOT, self.thumbnail(post).name)
+
+    @requires_resize
+    @mock.patch.object(thumbnails, 'THUMBNAIL_WORKERS', 0)
+    @mock.patch.object(thumbnails.transaction, 'on_commit', run_on_commit)
+    def test_created_after_save(self):
+        """Миниатюра создается при сохранении поста с картинкой."""
+        with mock.patch.object(
+                thumbnails, 'generate', wraps=thumbnails.generate) as gen:
+            post = self.create_post()
+        gen.assert_called_once_with(post.image.name)
+        self.assertTrue(os.path.exists(self.thumbnail_path(post)))
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail_url, self.thumbnail(post).url)
+
+    @mock.patch.object(thumbnails.transaction, 'on_commit', run_on_commit)
+    def test_background_pool(self):
+        """По умолчанию миниатюры создаются в пуле потоков."""
+        executor = mock.Mock()
+        with mock.patch.object(
+                thumbnails, '_get_executor', return_value=executor):
+            post = self.create_post()
+        executor.submit.assert_called_once_with(
+            thumbnails._generate_in_background, post.image.name)
+
+    @requires_resize
+    def test_warm_thumbnails(self):
+        """Команда создает недостающие и пропавшие миниатюры."""
+        post = self.create_post()
+        path = self.thumbnail_path(post)
+        os.remove(path)
+        self.assertIsNotNone(default.kvstore.get(self.thumbnail(post)))
+        call_command('warm_thumbnails', workers=1, stdout=StringIO())
+        self.assertTrue(os.path.exists(path))
+
+    def test_store_and_prefetch(self):
+        """Данные миниатюры пишутся в пост, а старым объектам — из кэша."""
+        post = self.create_post()
+        stale = Post.objects.get(pk=post.pk)
+        other = Post.objects.create(author=self.user, text='Без картинки')
+        thumbnails.store(post.image.name, SimpleNamespace(
+            url='/media/cache/thumb.gif', width=960, height=339))
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.thumbnail_url, post.thumbnail_width, post.thumbnail_height),
+            ('/media/cache/thumb.gif', 960, 339),
+        )
+        with mock.patch.object(
+                thumbnails.cache, 'get_many',
+                wraps=thumbnails.cache.get_many) as get_many:
+            posts = thumbnails.prefetch([stale, other])
+        get_many.assert_called_once()
+        self.assertEqual(posts[0].thumbnail_url, '/media/cache/thumb.gif')
+        self.assertEqual(posts[1].thumbnail_url, '')
+
+    def test_feed_uses_stored_thumbnail(self):
+        """Лента показывает сохраненную миниатюру без тега thumbnail."""
+        post = self.create_post()
+        thumbnails.store(post.image.name, SimpleNamespace(
+            url='/media/cache/stored.gif', width=960, height=339))
+        with mock.patch(
+                'sorl.thumbnail.templatetags.thumbnail.default.backend'
+                '.get_thumbnail') as get_thumbnail:
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'src="/media/cache/stored.gif"')
+        get_thumbnail.assert_not_called()
+
+    def test_new_image_resets_thumbnail(self):
+        """Смена картинки сбрасывает сохраненную миниатюру."""
+        post = self.create_post()
+        thumbnails.store(post.image.name, SimpleNamespace(
+            url='/media/cache/old.gif', width=960, height=339))
+        post.refresh_from_db()
+        post.text = 'Новый текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail_url, '/media/cache/old.gif')
+        post.image = SimpleUploadedFile('other.gif', SMALL_GIF, 'image/gif')
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail_url, '')
+        self.assertIsNone(post.thumbnail_width)
@@ -0,0 +1,113 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import counters, timeline
+from ..models import Follow, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+
+class TimelineTestCase(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username='Reader')
+        self.author = User.objects.create_user(username='Author')
+        self.other = User.objects.create_user(username='Other')
+        self.old_post = Post.objects.create(author=self.author, text='Старый')
+
+    def feed(self):
+        return list(timeline.follow_feed(self.reader))
+
+    def test_follow_backfills(self):
+        """Подписка добавляет в ленту уже опубликованные посты автора."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.feed(), [self.old_post])
+
+    def test_publish_fans_out(self):
+        """Новый пост сразу попадает в ленты подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый')
+        Post.objects.create(author=self.other, text='Чужой')
+        self.assertEqual(self.feed(), [post, self.old_post])
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2)
+
+    def test_unfollow_and_delete(self):
+        """Отписка и удаление поста убирают записи ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый')
+        post.delete()
+        self.assertEqual(self.feed(), [self.old_post])
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(self.feed(), [])
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_celebrity_fan_out_on_read(self):
+        """Посты авторов с множеством подписчиков подмешиваются при чтении."""
+        Follow.objects.create(user=self.reader, author=self.other)
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserStats.objects.update_or_create(
+            user=self.author, defaults={'follower_count': 5})
+        with mock.patch.object(timeline, 'TIMELINE_FANOUT_LIMIT', 1):
+            post = Post.objects.create(author=self.author, text='Звезда')
+            other_post = Post.objects.create(author=self.other, text='Обычный')
+            self.assertFalse(
+                TimelineEntry.objects.filter(post=post).exists())
+            self.assertEqual(
+                self.feed(), [other_post, post, self.old_post])
+
+    def test_celebrity_drops_below_limit(self):
+        """Посты, написанные над пределом, раскладываются после отписок."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+        with mock.patch.object(timeline, 'TIMELINE_FANOUT_LIMIT', 1):
+            post = Post.objects.create(author=self.author, text='Звезда')
+            self.assertFalse(
+                TimelineEntry.objects.filter(post=post).exists())
+            Follow.objects.filter(user=self.other).delete()
+            self.assertEqual(self.feed(), [post, self.old_post])
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+
+    def test_count_after_limit_crossed(self):
+        """Счетчик ленты пересчитывается, когда автор переходит предел."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+        Post.objects.create(author=self.author, text='Новый')
+        with mock.patch.object(timeline, 'TIMELINE_FANOUT_LIMIT', 1):
+            self.assertEqual(counters.follow_posts_count(self.reader.pk), 2)
+            Post.objects.create(author=self.author, text='Звезда')
+            self.assertEqual(counters.follow_posts_count(self.reader.pk), 3)
+        self.assertEqual(counters.follow_posts_count(self.reader.pk), 2)
+        self.assertEqual(
+            counters.follow_posts_count(self.reader.pk),
+            timeline.follow_feed(self.reader).count())
+
+    def test_rebuild_timeline(self):
+        """rebuild_timeline пересобирает ленты по подпискам."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timeline', stdout=StringIO())
+        self.assertEqual(self.feed(), [self.old_post])
+
+    def test_rebuild_limit_and_celebrities(self):
+        """Пересборка берет limit постов автора и пропускает звезд."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.other)
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(3)
+        ]
+        Post.objects.create(author=self.other, text='Звезда')
+        UserStats.objects.update_or_create(
+            user=self.other, defaults={'follower_count': 5})
+        with mock.patch.object(timeline, 'TIMELINE_FANOUT_LIMIT', 1):
+            self.assertEqual(timeline.rebuild(limit=2), 2)
+        self.assertEqual(
+            list(Post.objects.filter(timeline_entries__user=self.reader)
+                 .order_by('-timeline_entries__created')),
+            posts[:0:-1],
+        )
@@ -0,0 +1,111 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import transfer
+from ..models import Comment, Follow, Group, Post, User
+
+TEMP_DIR = tempfile.mkdtemp()
+
+
+class TransferTestCase(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+        self.reader = User.objects.create_user(username='Reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='transfer', description='Описание')
+        self.posts = [
+            Post.objects.create(
+                author=self.author, text=f'Пост {i}', group=self.group)
+            for i in range(5)
+        ]
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Комментарий')
+        Post.objects.filter(pk=self.posts[0].pk).update(comment_count=1)
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def snapshot(self):
+        return {
+            model._meta.label_lower: list(
+                model.objects.order_by('pk').values())
+            for model in transfer.MODELS
+        }
+
+    def clear(self):
+        for model in reversed(transfer.MODELS):
+            model.objects.all().delete()
+
+    def round_trip(self, name):
+        path = os.path.join(TEMP_DIR, name)
+        expected = self.snapshot()
+        call_command('export_content', path, batch_size=2, stdout=StringIO())
+        self.clear()
+        call_command('import_content', path, batch_size=2, stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+        return path
+
+    def test_round_trip(self):
+        """Выгрузка и загрузка сохраняют pk, даты и связи объектов."""
+        path = self.round_trip('content.jsonl')
+        with open(path, encoding='utf-8') as file:
+            lines = [json.loads(line) for line in file]
+        self.assertEqual(len(lines), 8)
+        self.assertEqual(lines[0]['model'], 'posts.group')
+        self.assertFalse(os.path.exists(path + '.export.checkpoint'))
+
+    def test_gzip(self):
+        """Файл .gz сжимается и читается обратно."""
+        path = self.round_trip('content.jsonl.gz')
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 8)
+
+    def test_resume_export(self):
+        """Оборванная выгрузка продолжается с последней целой пачки."""
+        path = os.path.join(TEMP_DIR, 'resume.jsonl.gz')
+        expected = self.snapshot()
+        write_batch = transfer._write_batch
+        calls = []
+
+        def failing_write(*args):
+            calls.append(args)
+            if len(calls) == 3:
+                args[1].write(b'broken')
+                raise OSError('Диск заполнен')
+            return write_batch(*args)
+
+        with mock.patch.object(transfer, '_write_batch', failing_write):
+            with self.assertRaises(OSError):
+                transfer.export_content(path, batch_size=2)
+        self.assertTrue(os.path.exists(path + '.export.checkpoint'))
+        transfer.export_content(path, batch_size=2, resume=True)
+        self.clear()
+        transfer.import_content(path)
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_resume_import(self):
+        """Загрузка продолжается после последней сохраненной пачки."""
+        path = os.path.join(TEMP_DIR, 'import.jsonl')
+        transfer.export_content(path)
+        Comment.objects.all().delete()
+        transfer.write_checkpoint(path, transfer.IMPORT, {'lines': 6})
+        totals = transfer.import_content(path, resume=True)
+        self.assertEqual(totals, {'posts.comment': 1, 'posts.follow': 1})
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_new_objects_after_import(self):
+        """После загрузки новые объекты получают свободные pk."""
+        self.round_trip('sequences.jsonl')
+        post = Post.objects.create(author=self.author, text='Новый')
+        self.assertGreater(post.pk, self.posts[-1].pk)
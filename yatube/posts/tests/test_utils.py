@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+
+from ..models import Post
+from ..utils import CursorPaginator, FeedPaginator, paginator
+
+User = get_user_model()
+
+
+class CursorPaginatorTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='CursorUser')
+        for i in range(15):
+            Post.objects.create(author=cls.user, text=f'Пост {i}')
+        cls.expected = list(
+            Post.objects.order_by('-created', '-pk').values_list(
+                'pk', flat=True))
+        cls.factory = RequestFactory()
+
+    def get_page(self, cursor=None, per_page=4):
+        data = {'cursor': cursor} if cursor else {}
+        request = self.factory.get('/', data)
+        return paginator(request, Post.objects.all(), per_page, cursor=True)
+
+    def test_walk_forward(self):
+        """Проход по курсорам выдает все посты по порядку без повторов."""
+        seen = []
+        page_obj = self.get_page()
+        self.assertFalse(page_obj.has_previous())
+        while True:
+            seen.extend(post.pk for post in page_obj)
+            if not page_obj.has_next():
+                break
+            page_obj = self.get_page(page_obj.next_cursor)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(page_obj), 3)
+
+    def test_walk_backward(self):
+        """Курсор назад возвращает предыдущую страницу."""
+        first = self.get_page()
+        second = self.get_page(first.next_cursor)
+        back = self.get_page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_bad_cursor(self):
+        """Испорченный курсор отдает первую страницу."""
+        for cursor in ('garbage', 'bnwxfDF8Mg', '!!!'):
+            with self.subTest(cursor=cursor):
+                page_obj = self.get_page(cursor)
+                self.assertEqual(
+                    [post.pk for post in page_obj], self.expected[:4])
+
+    def test_cursor_is_opaque(self):
+        """Курсор не раскрывает параметры запроса в открытом виде."""
+        cursor = self.get_page().next_cursor
+        self.assertNotIn('|', cursor)
+        self.assertIsNotNone(
+            CursorPaginator(Post.objects.all(), 4).decode_cursor(cursor))
+
+    def test_constant_query_count(self):
+        """Глубокая страница выбирается одним запросом без COUNT(*)."""
+        page_obj = self.get_page()
+        page_obj = self.get_page(page_obj.next_cursor)
+        with self.assertNumQueries(1):
+            page_obj = self.get_page(page_obj.next_cursor)
+            list(page_obj)
+
+    def test_count_is_lazy(self):
+        """Количество-функция вызывается только для страниц по номеру."""
+        calls = []
+
+        def count():
+            calls.append(1)
+            return 15
+
+        request = self.factory.get('/')
+        paginator(request, Post.objects.all(), 4, cursor=True, count=count)
+        self.assertEqual(calls, [])
+        page_obj = paginator(request, Post.objects.all(), 4, count=count)
+        self.assertEqual(page_obj.paginator.num_pages, 4)
+        self.assertEqual(calls, [1])
+
+
+class ElidedPageRangeTestCase(TestCase):
+    def setUp(self):
+        self.paginator = FeedPaginator(range(1000), 10)
+        self.gap = FeedPaginator.ELLIPSIS
+
+    def test_window(self):
+        """Края и окно вокруг текущей страницы, разрывы заменены ELLIPSIS."""
+        pages = {
+            1: [1, 2, 3, self.gap, 100],
+            5: [1, 2, 3, 4, 5, 6, 7, self.gap, 100],
+            50: [1, self.gap, 48, 49, 50, 51, 52, self.gap, 100],
+            100: [1, self.gap, 98, 99, 100],
+        }
+        for number, expected in pages.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    self.paginator.get_elided_page_range(number), expected)
+
+    def test_bounded_length(self):
+        """Длина списка не зависит от количества страниц."""
+        paginator = FeedPaginator(range(10 ** 6), 10)
+        pages = paginator.get_elided_page_range(40000, on_each_side=3)
+        self.assertEqual(len(pages), 2 * (3 + 1) + 3)
+
+    def test_few_pages(self):
+        """Для небольшого количества страниц выводятся все номера."""
+        paginator = FeedPaginator(range(50), 10)
+        self.assertEqual(
+            paginator.get_elided_page_range(3), [1, 2, 3, 4, 5])
@@ -7,11 +7,14 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from yatube.settings import POSTS_LIMIT
-from ..models import Follow, Group, Post
+from yatube.settings import COMMENTS_LIMIT, POSTS_LIMIT
+from .. import caching
+from ..models import Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -23,6 +26,7 @@ class ViewTestBaseCase(TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
+        cache.clear()
         cls.user = User.objects.create_user(username='HasNoName')
         small_gif = (
             b'\x47\x49\x46\x38\x39\x61\x02\x00'
@@ -396,12 +400,13 @@ class CacheCheckTestCase(TestCase):
             with self.subTest(cashed_post=self.cached_post):
                 self.assertEqual(field, expected)
 
-    def test_deleted_cached_post(self):
-        '''Пост удаляется только после очистки кэша.'''
+    def test_cached_page(self):
+        '''Без изменений постов лента отдается из кэша.'''
         reverse_name = 'posts:index'
         response = self.authorized_client.get(reverse(
             reverse_name)).content
-        Post.objects.filter(id=self.cached_post.pk).delete()
+        # update() не отправляет сигналы, поэтому версия ленты не меняется.
+        Post.objects.filter(id=self.cached_post.pk).update(text='changed')
         cached_response = self.authorized_client.get(reverse(
             reverse_name)).content
         cache.clear()
@@ -410,6 +415,28 @@ class CacheCheckTestCase(TestCase):
         self.assertEqual(response, cached_response)
         self.assertNotEqual(cached_response, refreshed_response)
 
+    def test_deleted_cached_post(self):
+        '''Удаленный пост сразу пропадает из закэшированной ленты.'''
+        reverse_name = 'posts:index'
+        response = self.authorized_client.get(reverse(
+            reverse_name)).content
+        Post.objects.filter(id=self.cached_post.pk).delete()
+        refreshed_response = self.authorized_client.get(reverse(
+            reverse_name)).content
+        self.assertIn(self.cached_post.text.encode(), response)
+        self.assertNotIn(self.cached_post.text.encode(), refreshed_response)
+
+    def test_cache_per_page(self):
+        '''Каждая страница ленты кэшируется отдельно.'''
+        for i in range(POSTS_LIMIT):
+            Post.objects.create(author=self.user, text=f'Пост {i}')
+        first_page = self.authorized_client.get(reverse('posts:index'))
+        second_page = self.authorized_client.get(
+            reverse('posts:index') + '?page=2')
+        self.assertNotIn(
+            self.cached_post.text.encode(), first_page.content)
+        self.assertIn(self.cached_post.text.encode(), second_page.content)
+
 
 class SubsriptionTestCase(TestCase):
     @classmethod
@@ -542,3 +569,106 @@ class SubscriptionViewsTestCase(TestCase):
         expected_follow_deleted = Follow.objects.filter(
             user=self.user_main, author=self.user_one).exists()
         self.assertNotEqual(expected_follow, expected_follow_deleted)
+
+
+class FeedQueriesTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='Reader')
+        self.group = Group.objects.create(title='Группа', slug='feed-group')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        self.add_posts(2)
+
+    def add_posts(self, count):
+        """Посты разных авторов в разных группах, на всех подписан reader."""
+        for i in range(count):
+            author = User.objects.create_user(
+                username=f'author{Post.objects.count()}',
+                first_name='Имя', last_name='Фамилия')
+            group = Group.objects.create(
+                title=f'Группа {author.username}', slug=author.username)
+            Post.objects.create(author=author, text='Пост', group=group)
+            Post.objects.create(author=author, text='Пост', group=self.group)
+            Follow.objects.create(user=self.reader, author=author)
+
+    def count_queries(self, url):
+        """Запросы к базе при сборке страницы без кэша страниц."""
+        self.authorized_client.get(url)
+        caching.bump_feed()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_fixed_query_count(self):
+        """Количество запросов не зависит от количества постов на странице."""
+        urls = {
+            'index': reverse('posts:index'),
+            'group_list': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': 'author0'}),
+            'follow_index': reverse('posts:follow_index'),
+        }
+        few = {name: self.count_queries(url) for name, url in urls.items()}
+        self.add_posts(POSTS_LIMIT)
+        for name, url in urls.items():
+            with self.subTest(page=name):
+                self.assertEqual(self.count_queries(url), few[name])
+
+    def test_index_single_query(self):
+        """Страница главной ленты выбирается одним запросом."""
+        self.client.get(reverse('posts:index'))
+        caching.bump_feed()
+        with self.assertNumQueries(1):
+            self.client.get(reverse('posts:index'))
+
+
+class CommentsPaginationTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Commentator')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        for i in range(COMMENTS_LIMIT + 5):
+            commentator = User.objects.create_user(username=f'reader{i}')
+            Comment.objects.create(
+                post=cls.post, author=commentator, text=f'Коммент {i}')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_post_detail_first_page(self):
+        """На странице поста первая страница комментариев."""
+        response = self.authorized_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_LIMIT)
+        self.assertTrue(comments.has_next())
+        self.assertEqual(comments[0].text, f'Коммент {COMMENTS_LIMIT + 4}')
+
+    def test_comments_endpoint(self):
+        """Следующая страница отдается отдельным фрагментом."""
+        first = self.authorized_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        cursor = first.context['comments'].next_cursor
+        response = self.client.get(reverse(
+            'posts:post_comments', kwargs={'post_id': self.post.pk}),
+            {'cursor': cursor})
+        self.assertTemplateUsed(response, 'posts/includes/comments_list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.text for comment in comments],
+            [f'Коммент {i}' for i in range(4, -1, -1)])
+        self.assertFalse(comments.has_next())
+
+    def test_comments_single_query(self):
+        """Страница комментариев с авторами выбирается одним запросом."""
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            self.client.get(url)
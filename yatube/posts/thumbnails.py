@@ -0,0 +1,159 @@
+"""Создание миниатюр картинок постов заранее, а не при первом показе.
+
+После сохранения поста с картинкой (и только после коммита транзакции)
+миниатюры всех размеров из THUMBNAIL_PRESETS создаются в пуле потоков.
+Шаблоны используют те же geometry и параметры, поэтому тег thumbnail
+находит готовую миниатюру в хранилище ключей sorl-thumbnail.
+
+Адрес и размеры миниатюры первого размера (его показывают ленты)
+записываются в строку поста и в кэш. Лентам тогда не нужен тег
+thumbnail на каждый пост: посты, загруженные до появления миниатюры,
+получают ее данные одним cache.get_many (prefetch).
+
+Картинку без ссылок release только помечает, а удаляет sweep (команда
+sweep_images) по прошествии IMAGE_RELEASE_GRACE секунд.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils import timezone
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from yatube.settings import (IMAGE_RELEASE_GRACE, OBJECT_CACHE_TIMEOUT,
+                             THUMBNAIL_PRESETS, THUMBNAIL_WORKERS)
+from .caching import hashed
+from .models import Post, ReleasedImage
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_KEY = 'posts:thumbnail:{}'
+FIELDS = ('thumbnail_url', 'thumbnail_width', 'thumbnail_height')
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            THUMBNAIL_WORKERS, thread_name_prefix='thumbnails')
+    return _executor
+
+
+def generate(name):
+    """Создает недостающие миниатюры картинки; возвращает их число.
+
+    Миниатюра, которая есть в хранилище ключей, но пропала
+    из файлового хранилища, создается заново.
+    """
+    created = 0
+    for index, (geometry, options) in enumerate(THUMBNAIL_PRESETS):
+        try:
+            thumbnail = get_thumbnail(name, geometry, **options)
+            if not thumbnail.exists():
+                default.kvstore.delete(thumbnail)
+                thumbnail = get_thumbnail(name, geometry, **options)
+            if thumbnail.exists():
+                created += 1
+                if index == 0:
+                    store(name, thumbnail)
+        except Exception:
+            logger.exception('Не удалось создать миниатюру %s', name)
+    return created
+
+
+def store(name, thumbnail):
+    """Записывает адрес и размеры миниатюры в посты с картинкой и в кэш."""
+    values = dict(zip(FIELDS, (
+        thumbnail.url, thumbnail.width, thumbnail.height)))
+    cache.set(THUMBNAIL_KEY.format(hashed(name)), values,
+              OBJECT_CACHE_TIMEOUT)
+    Post.objects.filter(image=name).exclude(**values).update(**values)
+
+
+def prefetch(posts):
+    """Дополняет посты без сохраненной миниатюры данными из кэша.
+
+    Все ключи читаются одним get_many. Возвращает список постов.
+    """
+    posts = list(posts)
+    keys = {
+        THUMBNAIL_KEY.format(hashed(post.image.name)): post
+        for post in posts
+        if post.image and not post.thumbnail_url
+    }
+    for key, values in cache.get_many(keys).items():
+        for field, value in values.items():
+            setattr(keys[key], field, value)
+    return posts
+
+
+def release(name):
+    """Помечает картинку освобожденной; удалит ее sweep.
+
+    Одинаковые картинки хранятся одним файлом, и новый пост может
+    сослаться на него, пока его прежний владелец удаляется. Поэтому
+    файл не удаляется сразу, а ждет IMAGE_RELEASE_GRACE секунд.
+    """
+    ReleasedImage.objects.update_or_create(
+        name=name, defaults={'released': timezone.now()})
+
+
+def _delete(name):
+    try:
+        image = ImageFile(name, Post._meta.get_field('image').storage)
+        default.kvstore.delete_thumbnails(image)
+        default.kvstore.delete(image)
+        image.delete()
+    except Exception:
+        logger.exception('Не удалось удалить картинку %s', name)
+    cache.delete(THUMBNAIL_KEY.format(hashed(name)))
+
+
+def sweep(grace=IMAGE_RELEASE_GRACE):
+    """Удаляет картинки, освобожденные больше grace секунд назад.
+
+    Картинка остается, если на нее снова ссылается пост или если
+    хранилище получило тот же файл после начала срока: пост с ним
+    может быть еще не закоммичен. Возвращает число удаленных файлов.
+    """
+    cutoff = timezone.now() - timedelta(seconds=grace)
+    storage = Post._meta.get_field('image').storage
+    deleted = 0
+    names = ReleasedImage.objects.filter(
+        released__lte=cutoff).values_list('name', flat=True)
+    for name in list(names):
+        if not Post.objects.filter(image=name).exists():
+            try:
+                reused = storage.get_modified_time(name) > cutoff
+            except OSError:
+                reused = False
+            if reused:
+                continue
+            _delete(name)
+            deleted += 1
+        ReleasedImage.objects.filter(name=name).delete()
+    return deleted
+
+
+def _generate_in_background(name):
+    try:
+        generate(name)
+    finally:
+        # Поток пула держит собственные подключения к базе.
+        connections.close_all()
+
+
+def schedule(name):
+    """Создает миниатюры картинки name после коммита транзакции."""
+    def submit():
+        if THUMBNAIL_WORKERS:
+            _get_executor().submit(_generate_in_background, name)
+        else:
+            generate(name)
+
+    transaction.on_commit(submit)
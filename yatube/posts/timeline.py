@@ -0,0 +1,208 @@
+"""Лента подписок с раскладкой постов при публикации (fan-out on write).
+
+Новый пост автора сразу записывается в ленты его подписчиков
+(TimelineEntry), поэтому страница ленты — это один проход по индексу
+(user, created, post). Авторов с числом подписчиков больше
+TIMELINE_FANOUT_LIMIT не раскладываем: их посты подмешиваются
+в ленту при чтении (fan-out on read). Когда у такого автора остается
+TIMELINE_FANOUT_LIMIT подписчиков, его последние посты раскладываются
+по их лентам (fill_author), иначе написанное за время над пределом
+пропало бы из лент.
+
+Количество записей ленты читателя кэшируется вместе с набором
+исключенных авторов; раскладка, подписка, отписка и удаление поста
+сбрасывают его у затронутых читателей.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Q
+
+from core.routers import use_primary
+from yatube.settings import (POSTS_COUNT_TIMEOUT, TIMELINE_BACKFILL,
+                             TIMELINE_FANOUT_LIMIT)
+from .models import Follow, Post, TimelineEntry, UserStats
+
+BATCH_SIZE = 1000
+# Ключ курсора ленты подписок (utils.CursorPaginator): колонки created
+# и post_id записи ленты, по которым построен индекс timeline_user_feed
+CURSOR_KEYS = ('entry_created', 'entry_post')
+COUNT_KEY = 'posts:count:timeline:{}'
+
+
+def is_celebrity(author_id):
+    follower_count = UserStats.objects.filter(pk=author_id).values_list(
+        'follower_count', flat=True).first()
+    return (follower_count or 0) > TIMELINE_FANOUT_LIMIT
+
+
+def followed_celebrities(user_id):
+    """Авторы из подписок читателя, чьи посты подмешиваются при чтении."""
+    return list(Follow.objects.filter(
+        user_id=user_id,
+        author__stats__follower_count__gt=TIMELINE_FANOUT_LIMIT,
+    ).values_list('author_id', flat=True))
+
+
+def entries_count(user_id, exclude_authors=()):
+    """Количество записей ленты читателя без постов exclude_authors.
+
+    Счетчик, посчитанный для другого набора exclude_authors (автор
+    перешел TIMELINE_FANOUT_LIMIT), считается заново.
+    """
+    key = COUNT_KEY.format(user_id)
+    authors = tuple(sorted(exclude_authors))
+    cached = cache.get(key)
+    if cached is not None and cached[0] == authors:
+        return cached[1]
+    with use_primary():
+        count = TimelineEntry.objects.filter(user_id=user_id).exclude(
+            author_id__in=authors).count()
+    cache.set(key, (authors, count), POSTS_COUNT_TIMEOUT)
+    return count
+
+
+def forget_counts(user_ids):
+    cache.delete_many([COUNT_KEY.format(pk) for pk in user_ids])
+
+
+def _entry(user_id, post):
+    return TimelineEntry(
+        user_id=user_id,
+        post_id=post.pk,
+        author_id=post.author_id,
+        created=post.created,
+    )
+
+
+def fan_out(post):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    batch = []
+    for user_id in follower_ids.iterator(chunk_size=BATCH_SIZE):
+        batch.append(_entry(user_id, post))
+        if len(batch) >= BATCH_SIZE:
+            _add(batch)
+            batch = []
+    _add(batch)
+
+
+def _add(batch):
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+    forget_counts({entry.user_id for entry in batch})
+
+
+def post_removed(post):
+    """Сбрасывает счетчики лент, из которых удален пост автора."""
+    if is_celebrity(post.author_id):
+        return
+    follower_ids = list(Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True))
+    for start in range(0, len(follower_ids), BATCH_SIZE):
+        forget_counts(follower_ids[start:start + BATCH_SIZE])
+
+
+def backfill(user_id, author_id, limit=TIMELINE_BACKFILL):
+    """Добавляет в ленту последние посты автора после подписки."""
+    if is_celebrity(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).only(
+        'pk', 'author_id', 'created')[:limit]
+    TimelineEntry.objects.bulk_create(
+        [_entry(user_id, post) for post in posts],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    forget_counts([user_id])
+
+
+def remove(user_id, author_id):
+    """Убирает посты автора из ленты после отписки."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+    forget_counts([user_id])
+
+
+def follower_removed(author_id):
+    """Раскладывает посты автора, опустившегося до предела подписчиков."""
+    follower_count = UserStats.objects.filter(pk=author_id).values_list(
+        'follower_count', flat=True).first()
+    if follower_count == TIMELINE_FANOUT_LIMIT:
+        fill_author(author_id)
+
+
+def fill_author(author_id, limit=TIMELINE_BACKFILL):
+    """Добавляет последние limit постов автора в ленты подписчиков."""
+    posts = list(Post.objects.filter(author_id=author_id).only(
+        'pk', 'author_id', 'created')[:limit])
+    if not posts:
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+    batch = []
+    for user_id in follower_ids.iterator(chunk_size=BATCH_SIZE):
+        batch.extend(_entry(user_id, post) for post in posts)
+        if len(batch) >= BATCH_SIZE:
+            _add(batch)
+            batch = []
+    _add(batch)
+
+
+REBUILD_SQL = """
+    INSERT INTO {entry} (user_id, post_id, author_id, created)
+    SELECT follow.user_id, post.id, post.author_id, post.created
+    FROM {follow} follow
+    JOIN (
+        SELECT id, author_id, created, ROW_NUMBER() OVER (
+            PARTITION BY author_id ORDER BY created DESC, id DESC
+        ) AS position
+        FROM {post}
+    ) post ON post.author_id = follow.author_id AND post.position <= %s
+    WHERE follow.author_id NOT IN (
+        SELECT user_id FROM {stats} WHERE follower_count > %s
+    )
+"""
+
+
+def rebuild(limit=TIMELINE_BACKFILL):
+    """Заново раскладывает посты по лентам; возвращает число записей.
+
+    Ленты собираются одним INSERT ... SELECT: последние limit постов
+    каждого автора (оконная функция ROW_NUMBER, есть в SQLite 3.25+
+    и PostgreSQL) попадают в ленты всех его подписчиков.
+    """
+    TimelineEntry.objects.all().delete()
+    sql = REBUILD_SQL.format(
+        entry=TimelineEntry._meta.db_table,
+        follow=Follow._meta.db_table,
+        post=Post._meta.db_table,
+        stats=UserStats._meta.db_table,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [limit, TIMELINE_FANOUT_LIMIT])
+        created = cursor.rowcount
+    forget_counts(Follow.objects.values_list(
+        'user_id', flat=True).distinct().iterator())
+    return created
+
+
+def follow_feed(user):
+    """Посты ленты подписок пользователя, новые сначала.
+
+    Ключ курсора — аннотации CURSOR_KEYS.
+    """
+    celebrity_ids = followed_celebrities(user.pk)
+    if not celebrity_ids:
+        # Аннотации используют тот же JOIN, что и фильтр по читателю,
+        # поэтому условие курсора и сортировка идут по индексу ленты.
+        posts = Post.objects.filter(timeline_entries__user=user).annotate(
+            entry_created=F('timeline_entries__created'),
+            entry_post=F('timeline_entries__post'),
+        )
+    else:
+        entries = TimelineEntry.objects.filter(user=user).values('post_id')
+        posts = Post.objects.filter(
+            Q(pk__in=entries) | Q(author_id__in=celebrity_ids)).annotate(
+            entry_created=F('created'), entry_post=F('pk'))
+    return posts.order_by('-entry_created', '-entry_post')
@@ -0,0 +1,183 @@
+"""Потоковая выгрузка и загрузка контента в JSON Lines.
+
+Каждая строка файла — один объект в формате сериализатора python
+Django: {"model": ..., "pk": ..., "fields": {...}}. Таблицы читаются
+итератором по возрастанию pk и пишутся пачками, поэтому память не
+зависит от размера таблиц. Файл с расширением .gz сжимается, каждая
+пачка — отдельный член gzip, так что оборванную выгрузку можно обрезать
+по последней целой пачке и продолжить.
+
+После каждой пачки в файл <путь>.export.checkpoint (или
+.import.checkpoint) записывается, докуда дошла работа; при повторном
+запуске с resume она продолжается с этого места, а после успешного
+завершения файл удаляется.
+"""
+import gzip
+import json
+import os
+from datetime import datetime
+
+from django.core import serializers
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+
+from .models import Comment, Follow, Group, Post
+from .seed import explicit_created
+
+BATCH_SIZE = 1000
+# Порядок важен: объекты ссылаются только на выгруженные раньше
+MODELS = [Group, Post, Comment, Follow]
+EXPORT = 'export'
+IMPORT = 'import'
+
+
+def checkpoint_path(path, kind):
+    return f'{path}.{kind}.checkpoint'
+
+
+def read_checkpoint(path, kind):
+    try:
+        with open(checkpoint_path(path, kind)) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(path, kind, state):
+    tmp_path = checkpoint_path(path, kind) + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(state, file)
+    os.replace(tmp_path, checkpoint_path(path, kind))
+
+
+def remove_checkpoint(path, kind):
+    try:
+        os.remove(checkpoint_path(path, kind))
+    except FileNotFoundError:
+        pass
+
+
+def is_gzip(path):
+    return path.endswith('.gz')
+
+
+class ContentEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder, сохраняющий микросекунды в датах."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _lines(objs):
+    return ''.join(
+        json.dumps(data, cls=ContentEncoder, ensure_ascii=False) + '\n'
+        for data in serializers.serialize('python', objs)
+    ).encode()
+
+
+def export_content(path, batch_size=BATCH_SIZE, resume=False):
+    """Выгружает группы, посты, комментарии и подписки в файл path.
+
+    Возвращает число выгруженных объектов по меткам моделей.
+    """
+    state = read_checkpoint(path, EXPORT) if resume else None
+    labels = [model._meta.label_lower for model in MODELS]
+    done = labels.index(state['model']) if state else 0
+    totals = {}
+    with open(path, 'r+b' if state else 'wb') as file:
+        if state:
+            file.seek(state['offset'])
+            file.truncate()
+        for model, label in zip(MODELS[done:], labels[done:]):
+            last_pk = 0
+            if state and label == state['model']:
+                last_pk = state['pk']
+            queryset = model.objects.filter(pk__gt=last_pk).order_by('pk')
+            totals[label] = 0
+            batch = []
+            for obj in queryset.iterator(chunk_size=batch_size):
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    last_pk = _write_batch(path, file, label, batch)
+                    totals[label] += len(batch)
+                    batch = []
+            if batch:
+                _write_batch(path, file, label, batch)
+                totals[label] += len(batch)
+    remove_checkpoint(path, EXPORT)
+    return totals
+
+
+def _write_batch(path, file, label, batch):
+    data = _lines(batch)
+    file.write(gzip.compress(data) if is_gzip(path) else data)
+    file.flush()
+    os.fsync(file.fileno())
+    last_pk = batch[-1].pk
+    write_checkpoint(
+        path, EXPORT, {'offset': file.tell(), 'model': label, 'pk': last_pk})
+    return last_pk
+
+
+def _open_lines(path):
+    if is_gzip(path):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def import_content(path, batch_size=BATCH_SIZE, resume=False):
+    """Загружает объекты из файла path, пропуская уже существующие.
+
+    Объекты сохраняются с исходными pk через bulk_create, сигналы
+    не срабатывают. Возвращает число прочитанных объектов по моделям.
+    """
+    state = read_checkpoint(path, IMPORT) if resume else None
+    skip = state['lines'] if state else 0
+    totals = {}
+    batch = []
+    line_number = 0
+    with _open_lines(path) as file, explicit_created(*MODELS):
+        for line_number, line in enumerate(file, 1):
+            if line_number <= skip:
+                continue
+            data = json.loads(line)
+            if batch and batch[0]['model'] != data['model']:
+                _load_batch(path, batch, line_number - 1, totals)
+                batch = []
+            batch.append(data)
+            if len(batch) >= batch_size:
+                _load_batch(path, batch, line_number, totals)
+                batch = []
+        _load_batch(path, batch, line_number, totals)
+    _reset_sequences()
+    remove_checkpoint(path, IMPORT)
+    return totals
+
+
+def _load_batch(path, batch, line_number, totals):
+    if batch:
+        objs = [
+            deserialized.object
+            for deserialized in serializers.deserialize('python', batch)
+        ]
+        for obj in objs:
+            # В выгрузках до появления modified его нет
+            if getattr(obj, 'modified', False) is None:
+                obj.modified = obj.created
+        model = type(objs[0])
+        model.objects.bulk_create(objs, ignore_conflicts=True)
+        label = model._meta.label_lower
+        totals[label] = totals.get(label, 0) + len(objs)
+    write_checkpoint(path, IMPORT, {'lines': line_number})
+
+
+def _reset_sequences():
+    """Сдвигает последовательности pk за загруженные значения."""
+    statements = connection.ops.sequence_reset_sql(no_style(), MODELS)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -1,16 +1,28 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    # Ленты RSS и Atom
+    path('rss/', feeds.index_rss, name='index_rss'),
+    path('atom/', feeds.index_atom, name='index_atom'),
+    path('group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'),
+    path('group/<slug:slug>/atom/', feeds.group_atom, name='group_atom'),
+    path('profile/<str:username>/rss/',
+         feeds.profile_rss, name='profile_rss'),
+    path('profile/<str:username>/atom/',
+         feeds.profile_atom, name='profile_atom'),
     # Профайл пользователя
     path('profile/<str:username>/', views.profile, name='profile'),
     # Просмотр записи
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    # Страницы комментариев записи
+    path('posts/<int:post_id>/comments/',
+         views.post_comments, name='post_comments'),
     # Создание записи
     path('create/', views.post_create, name='post_create'),
     # Изменение записи
@@ -18,6 +30,8 @@ urlpatterns = [
     # Комментирование
     path('posts/<int:post_id>/comment/',
          views.add_comment, name='add_comment'),
+    # Поиск по постам и комментариям
+    path('search/', views.search, name='search'),
     path('follow/', views.follow_index, name='follow_index'),
     path('profile/<str:username>/follow/',
          views.profile_follow, name='profile_follow'),
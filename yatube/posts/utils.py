@@ -1,8 +1,204 @@
+import base64
+from collections.abc import Sequence
+
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from yatube.settings import PAGINATOR_ON_EACH_SIDE, PAGINATOR_ON_ENDS
 
 
-def paginator(request, object_list, per_page):
-    paginator = Paginator(object_list, per_page)
+def paginator(request, object_list, per_page, cursor=False, count=None,
+              keys=None):
+    """Страница ленты: по номеру (?page=) или по курсору (?cursor=).
+
+    count — заранее известное (например, из кэша) количество объектов,
+    чтобы не делать COUNT(*) по object_list, или функция без аргументов,
+    которая его возвращает: она вызывается только для страниц
+    по номеру, курсору количество не нужно. keys — поля ключа курсора
+    (см. CursorPaginator).
+    """
+    if cursor:
+        return CursorPaginator(object_list, per_page, keys).get_page(
+            request.GET.get('cursor'))
+    if callable(count):
+        count = count()
+    paginator = FeedPaginator(object_list, per_page, count=count)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.page_window = paginator.get_elided_page_range(
+        page_obj.number,
+        on_each_side=PAGINATOR_ON_EACH_SIDE,
+        on_ends=PAGINATOR_ON_ENDS,
+    )
     return page_obj
+
+
+class FeedPaginator(Paginator):
+    """Paginator с сокращенным списком номеров страниц.
+
+    Принимает готовое количество объектов count. Оно может быть
+    приблизительным, поэтому срез страницы от него не зависит.
+    """
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self)
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        """Номера страниц: края, окно вокруг текущей и ELLIPSIS в разрывах.
+
+        Длина списка не превышает 2 * (on_each_side + on_ends) + 3
+        при любом количестве страниц.
+        """
+        number = self.validate_number(number)
+        num_pages = self.num_pages
+        if num_pages <= (on_each_side + on_ends) * 2 + 1:
+            return list(self.page_range)
+        window = range(
+            max(number - on_each_side, 1),
+            min(number + on_each_side, num_pages) + 1,
+        )
+        pages = []
+        if window.start > on_ends + 2:
+            pages.extend(range(1, on_ends + 1))
+            pages.append(self.ELLIPSIS)
+        else:
+            pages.extend(range(1, window.start))
+        pages.extend(window)
+        if window.stop < num_pages - on_ends:
+            pages.append(self.ELLIPSIS)
+            pages.extend(range(num_pages - on_ends + 1, num_pages + 1))
+        else:
+            pages.extend(range(window.stop, num_pages + 1))
+        return pages
+
+
+class CursorPaginator:
+    """Пагинация по ключу (created, id).
+
+    Не делает COUNT(*) и OFFSET: каждая страница выбирается условием
+    «старше/новее последней показанной записи», поэтому время ответа
+    не зависит от глубины страницы. Курсор — непрозрачная строка
+    для параметра ?cursor=.
+
+    keys — имена полей или аннотаций с датой и id, по которым идет
+    ключ, если индекс ленты построен не по created и pk самих объектов.
+    """
+    NEXT = 'n'
+    PREVIOUS = 'p'
+    KEYS = ('created', 'pk')
+
+    def __init__(self, object_list, per_page, keys=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.created_key, self.pk_key = keys or self.KEYS
+
+    def _after(self, lookup, created, pk):
+        """Условие «ключ дальше (created, pk)»; lookup — lt или gt."""
+        return Q(**{f'{self.created_key}__{lookup}': created}) | Q(**{
+            self.created_key: created, f'{self.pk_key}__{lookup}': pk})
+
+    def encode_cursor(self, direction, obj):
+        created = getattr(obj, self.created_key)
+        pk = getattr(obj, self.pk_key)
+        raw = f'{direction}|{created.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        """Возвращает (direction, created, pk) или None для плохого курсора."""
+        if not token:
+            return None
+        try:
+            padding = '=' * (-len(token) % 4)
+            raw = base64.urlsafe_b64decode(token + padding).decode()
+            direction, created, pk = raw.split('|')
+            created = parse_datetime(created)
+            pk = int(pk)
+        except (ValueError, UnicodeDecodeError):
+            return None
+        if direction not in (self.NEXT, self.PREVIOUS) or created is None:
+            return None
+        return direction, created, pk
+
+    def following(self, cursor):
+        """Записи после курсора NEXT (без курсора — все), новые сначала."""
+        object_list = self.object_list
+        if cursor is not None:
+            _, created, pk = cursor
+            object_list = object_list.filter(self._after('lt', created, pk))
+        return object_list.order_by(
+            f'-{self.created_key}', f'-{self.pk_key}')
+
+    def get_page(self, token):
+        cursor = self.decode_cursor(token)
+        limit = self.per_page + 1
+        if cursor is None or cursor[0] == self.NEXT:
+            rows = list(self.following(cursor)[:limit])
+            return self._page(rows, has_previous=cursor is not None)
+        _, created, pk = cursor
+        rows = list(self.object_list.filter(
+            self._after('gt', created, pk)
+        ).order_by(self.created_key, self.pk_key)[:limit])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return CursorPage(rows, self, has_next=True, has_previous=has_previous)
+
+    def _page(self, rows, has_previous):
+        has_next = len(rows) > self.per_page
+        return CursorPage(
+            rows[:self.per_page], self,
+            has_next=has_next, has_previous=has_previous,
+        )
+
+
+class CursorPage(Sequence):
+    """Страница CursorPaginator с интерфейсом, совместимым с Page."""
+    is_cursor = True
+    number = None
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next and bool(object_list)
+        self._has_previous = has_previous and bool(object_list)
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(
+            CursorPaginator.NEXT, self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(
+            CursorPaginator.PREVIOUS, self.object_list[0])
@@ -1,27 +1,45 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.http import urlencode
+from django.views.decorators.http import require_GET
 
-from yatube.settings import POSTS_LIMIT
+from core.routers import primary_database, use_primary
+from yatube.settings import (COMMENTS_LIMIT, INDEX_CACHE_TIMEOUT,
+                             POSTS_CURSOR_PAGINATION, POSTS_LIMIT)
+from . import caching, conditional, counters, thumbnails, timeline
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
+from .models import Comment, Follow, Post, User, UserStats
+from .search import search_posts
 from .utils import paginator
 
 
 def index(request):
     title = 'Последние обновления на сайте.'
-    posts_list = Post.objects.select_related('author').all()
-    page_obj = paginator(request, posts_list, POSTS_LIMIT)
-    context = {
-        'title': title,
-        'page_obj': page_obj,
-    }
-    return render(request, 'posts/index.html', context)
-
-
+    # Лента попадает в общий кэш фрагмента шаблона, поэтому читается
+    # с основной базы, а не с отстающей реплики.
+    with use_primary():
+        posts_list = Post.objects.for_feed()
+        page_obj = paginator(
+            request, posts_list, POSTS_LIMIT,
+            cursor=POSTS_CURSOR_PAGINATION, count=counters.posts_count)
+        context = {
+            'title': title,
+            'page_obj': page_obj,
+            'cache_timeout': INDEX_CACHE_TIMEOUT,
+            'feed_version': caching.feed_version(),
+            'page_key': request.GET.get('cursor') or page_obj.number,
+        }
+        return render(request, 'posts/index.html', context)
+
+
+@conditional.group_condition
+@caching.cache_anonymous_page(caching.group_versions)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.select_related('group').filter(group=group)
-    page_obj = paginator(request, posts, POSTS_LIMIT)
+    group = caching.get_group(slug)
+    posts = Post.objects.for_feed().filter(group=group)
+    page_obj = paginator(
+        request, posts, POSTS_LIMIT, cursor=POSTS_CURSOR_PAGINATION,
+        count=lambda: counters.group_posts_count(group.pk))
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -29,11 +47,16 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional.profile_condition
+@caching.cache_anonymous_page(caching.profile_versions)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    a_posts = Post.objects.select_related('author').filter(author=author)
-    a_posts_count = a_posts.count()
-    page_obj = paginator(request, a_posts, POSTS_LIMIT)
+    author = caching.get_author(username)
+    a_posts = Post.objects.for_feed().filter(author=author)
+    stats = UserStats.objects.for_user(author.pk)
+    a_posts_count = stats.post_count
+    page_obj = paginator(
+        request, a_posts, POSTS_LIMIT, cursor=POSTS_CURSOR_PAGINATION,
+        count=a_posts_count)
     following = None
     self_sub = False
     if request.user.is_authenticated:
@@ -44,6 +67,7 @@ def profile(request, username):
     context = {
         'author': author,
         'a_posts_count': a_posts_count,
+        'stats': stats,
         'page_obj': page_obj,
         'following': following,
         'self_sub': self_sub,
@@ -51,11 +75,13 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@conditional.post_condition
+@caching.cache_anonymous_page(caching.post_versions)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    a_posts = Post.objects.select_related('author').filter(author=post.author)
-    a_posts_count = a_posts.count()
-    comments = Comment.objects.filter(post=post.pk)
+    post = caching.get_post(post_id)
+    thumbnails.prefetch([post])
+    a_posts_count = UserStats.objects.for_user(post.author_id).post_count
+    comments = post_comments_page(request, post)
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
@@ -66,7 +92,24 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments_page(request, post):
+    comments = Comment.objects.select_related('author').filter(post=post.pk)
+    return paginator(request, comments, COMMENTS_LIMIT, cursor=True)
+
+
+@require_GET
+def post_comments(request, post_id):
+    """Следующие страницы комментариев поста без остальной страницы."""
+    post = caching.get_post(post_id)
+    context = {
+        'post': post,
+        'comments': post_comments_page(request, post),
+    }
+    return render(request, 'posts/includes/comments_list.html', context)
+
+
 @login_required
+@primary_database
 def post_create(request):
     title = 'Новый пост'
     button = 'Добавить'
@@ -88,6 +131,7 @@ def post_create(request):
 
 
 @login_required
+@primary_database
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     is_edit = True
@@ -114,6 +158,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@primary_database
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -125,12 +170,31 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def search(request):
+    title = 'Поиск'
+    query = request.GET.get('q', '').strip()
+    found = search_posts(query) if query else []
+    page_obj = paginator(request, found, POSTS_LIMIT)
+    posts = Post.objects.for_feed().in_bulk(page_obj.object_list)
+    page_obj.object_list = [
+        posts[pk] for pk in page_obj.object_list if pk in posts]
+    context = {
+        'title': title,
+        'query': query,
+        'page_obj': page_obj,
+        'page_prefix': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def follow_index(request):
     title = 'Последние посты авторов, на которых вы подписаны'
-    posts_list = Post.objects.select_related('author').filter(
-        author__following__user=request.user)
-    page_obj = paginator(request, posts_list, POSTS_LIMIT)
+    posts_list = timeline.follow_feed(request.user).for_feed()
+    page_obj = paginator(
+        request, posts_list, POSTS_LIMIT, cursor=POSTS_CURSOR_PAGINATION,
+        count=lambda: counters.follow_posts_count(request.user.pk),
+        keys=timeline.CURSOR_KEYS)
     context = {
         'title': title,
         'page_obj': page_obj,
@@ -139,6 +203,7 @@ def follow_index(request):
 
 
 @login_required
+@primary_database
 def profile_follow(request, username):
     user = get_object_or_404(User, username=username)
     if request.user == user:
@@ -148,6 +213,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@primary_database
 def profile_unfollow(request, username):
     user = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=user).delete()
@@ -14,6 +14,99 @@ ALLOWED_HOSTS = [
 ]
 
 POSTS_LIMIT = 10
+COMMENTS_LIMIT = 20
+# Пагинация лент по курсору (?cursor=) вместо номеров страниц (?page=)
+POSTS_CURSOR_PAGINATION = False
+# Сколько номеров страниц показывать вокруг текущей и по краям
+PAGINATOR_ON_EACH_SIDE = 2
+PAGINATOR_ON_ENDS = 1
+# Время жизни счетчиков постов в кэше, секунды
+POSTS_COUNT_TIMEOUT = 60 * 60
+# Начиная с этого размера таблицы общий счетчик постов берется по оценке
+POSTS_COUNT_ESTIMATE_THRESHOLD = 1_000_000
+# Адрес memcached, общего для всех процессов сервера (нужен пакет
+# python-memcached). Без него каждый процесс держит свой LocMemCache
+# и не видит смены версий кэша в других процессах
+CACHE_LOCATION = os.environ.get('YATUBE_CACHE_LOCATION', '')
+# Время жизни закэшированной главной страницы, секунды. Кэш сбрасывается
+# при изменении постов, поэтому с общим кэшем время может быть большим;
+# с кэшем процесса устаревшая страница живет не дольше 20 секунд
+INDEX_CACHE_TIMEOUT = 60 * 10 if CACHE_LOCATION else 20
+# Время жизни страниц групп, профилей и постов, закэшированных целиком
+# для анонимных пользователей, и объектов, которые эти страницы ищут
+PAGE_CACHE_TIMEOUT = INDEX_CACHE_TIMEOUT
+OBJECT_CACHE_TIMEOUT = INDEX_CACHE_TIMEOUT
+# Посты авторов с большим числом подписчиков не раскладываются по лентам,
+# а подмешиваются в ленту подписок при чтении
+TIMELINE_FANOUT_LIMIT = 10_000
+# Сколько последних постов автора добавляется в ленту при подписке
+TIMELINE_BACKFILL = 200
+# Миниатюры картинок постов: geometry и параметры тега thumbnail.
+# Они создаются в фоне сразу после сохранения поста
+THUMBNAIL_PRESETS = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+# Сколько потоков создают миниатюры; 0 — создавать сразу в запросе
+THUMBNAIL_WORKERS = 2
+# Загрузка картинок постов: предельный размер файла в байтах и число
+# пикселей, наибольшая сторона после уменьшения, формат и качество
+# перекодирования. GIF сохраняются как есть, чтобы не терять анимацию
+IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 50_000_000
+IMAGE_MAX_SIDE = 1920
+IMAGE_FORMAT = 'WEBP'
+IMAGE_QUALITY = 80
+# Через сколько секунд после освобождения файл картинки без ссылок
+# удаляет команда sweep_images. Запас покрывает транзакции, которые
+# уже сослались на тот же файл, но еще не записали пост
+IMAGE_RELEASE_GRACE = 60 * 60
+# Полнотекстовый поиск: бэкенд индекса (posts.search.DatabaseBackend
+# работает с любой базой без индекса), предел найденных постов, число
+# учитываемых слов запроса и вес совпадения в комментарии относительно
+# совпадения в тексте поста
+SEARCH_BACKEND = 'posts.search.SQLiteBackend'
+SEARCH_MAX_RESULTS = 1000
+SEARCH_MAX_TERMS = 10
+SEARCH_COMMENT_WEIGHT = 0.5
+# Прагмы SQLite для каждого нового подключения (core.db). WAL позволяет
+# читать во время записи, synchronous=NORMAL в режиме WAL не портит
+# базу при сбое, busy_timeout — сколько мс писатель ждет блокировку.
+# cache_size отрицательный — в КиБ, mmap_size — в байтах
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'memory',
+}
+# Базы из DATABASES, с которых читают страницы (core.routers); пока
+# список пуст, все запросы идут в default. После записи браузер
+# получает cookie и REPLICA_STICKY_SECONDS секунд читает с default
+DATABASE_REPLICAS = []
+REPLICA_STICKY_SECONDS = 10
+REPLICA_STICKY_COOKIE = 'primary'
+# Сколько последних постов попадает в ленты RSS и Atom
+FEED_ITEMS_LIMIT = 20
+# Карта сайта (posts.sitemaps): каталог и URL, с которого веб-сервер
+# отдает файлы, адрес сайта для ссылок и наибольшее число адресов
+# в одном файле (50 000 — предел протокола sitemaps)
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_URL = '/sitemaps/'
+SITEMAP_BASE_URL = 'http://127.0.0.1:8000'
+SITEMAP_CHUNK_SIZE = 50_000
+# Наибольший размер страницы списков JSON API (?limit=)
+API_MAX_LIMIT = 100
+# Замеры запросов: заголовок Server-Timing и строка лога core.timing.
+# Запросы сверх бюджета (число SQL-запросов, время в мс) пишутся в лог
+# с уровнем WARNING
+REQUEST_TIMING = True
+REQUEST_QUERY_BUDGET = 30
+REQUEST_TIME_BUDGET = 500
+# Уровень лога core.timing: INFO — строка с замерами на каждый запрос,
+# WARNING — только запросы сверх бюджета
+REQUEST_TIMING_LOG_LEVEL = os.environ.get(
+    'YATUBE_TIMING_LOG_LEVEL', 'WARNING')
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -26,10 +119,13 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,9 +161,21 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        # Подключение живет между запросами до 60 секунд, поэтому прагмы
+        # из SQLITE_PRAGMAS не выполняются на каждый запрос
+        'CONN_MAX_AGE': 60,
+    },
+    # Реплика для проверки чтения с реплик на одной машине: копия
+    # default, которую обновляет команда sync_replica
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+        'CONN_MAX_AGE': 60,
+    },
 }
 
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -107,9 +215,33 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Загрузки больше этого размера пишутся во временный файл, а не в память
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
 
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+if CACHE_LOCATION:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': CACHE_LOCATION,
+    }
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['console'],
+            'level': REQUEST_TIMING_LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}